@@ -61,7 +61,7 @@ def main():
 	interfactive debugging """
 	# just create the needed object
 	logging.info( 'create cachedHelper object' )
-	cachedHelper = CachedPrestaHelper( config.presta_api_url, config.presta_api_key, debug = False, progressCallback = progressHandler )
+	cachedHelper = CachedPrestaHelper( config.presta_api_url, config.presta_api_key, debug = False, progressCallback = progressHandler, page_size = config.presta_api_page_size, page_workers = config.presta_api_page_workers, pool_size = config.presta_api_pool_size, timeout = config.presta_api_timeout, output_format = config.presta_api_output_format )
 
 	value = raw_input( 'Rafraichir le cache (y/n)' )
 	if value == 'y':
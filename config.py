@@ -17,6 +17,12 @@ CONFIG_SECTION_ORDER_SHIP = 'ORDER-SHIP'
 # Keynames for section PRESTA-API
 CONFIG_KEY_KEY = 'key'
 CONFIG_KEY_URL = 'url'
+CONFIG_KEY_PAGE_SIZE = 'page_size'
+CONFIG_KEY_PAGE_WORKERS = 'page_workers'
+CONFIG_KEY_POOL_SIZE = 'pool_size'
+CONFIG_KEY_TIMEOUT = 'timeout'
+CONFIG_KEY_STOCK_REFRESH = 'stock_refresh'
+CONFIG_KEY_OUTPUT_FORMAT = 'output_format'
 
 # Keynames for section PRESTA-API
 CONFIG_KEY_PROMPT     = 'prompt'
@@ -54,6 +60,12 @@ class Config(object):
 	"""read paramters from the "config.ini" configuration file"""
 	_presta_api_key = 'None'
 	_presta_api_url = 'None'
+	_presta_api_page_size = None
+	_presta_api_page_workers = 4
+	_presta_api_pool_size = 10
+	_presta_api_timeout = None
+	_presta_api_stock_refresh = 0
+	_presta_api_output_format = 'XML'
 	_app_prompt     = ''
 	_logfile = 'None'
 	_lcd_device = 'None'
@@ -77,6 +89,34 @@ class Config(object):
 
 		self._presta_api_key = config.get( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_KEY )
 		self._presta_api_url = config.get( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_URL )
+		# Read large resources by pages (optional)
+		try:
+			self._presta_api_page_size = config.getint( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_PAGE_SIZE )
+		except:
+			pass
+		try:
+			self._presta_api_page_workers = config.getint( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_PAGE_WORKERS )
+		except:
+			pass
+		# HTTP session (optional)
+		try:
+			self._presta_api_pool_size = config.getint( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_POOL_SIZE )
+		except:
+			pass
+		try:
+			self._presta_api_timeout = config.getfloat( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_TIMEOUT )
+		except:
+			pass
+		# Background stock refresh (optional)
+		try:
+			self._presta_api_stock_refresh = config.getint( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_STOCK_REFRESH )
+		except:
+			pass
+		# Output format of the list resources (optional)
+		try:
+			self._presta_api_output_format = config.get( CONFIG_SECTION_PRESTAAPI, CONFIG_KEY_OUTPUT_FORMAT ).upper()
+		except:
+			pass
 
 		self._app_prompt = config.get( CONFIG_SECTION_APP, CONFIG_KEY_PROMPT )
 		try:
@@ -150,6 +190,37 @@ class Config(object):
 		Should be http://shop.my_domain_name.be/api"""
 		return self._presta_api_url
 
+	@property
+	def presta_api_page_size( self ):
+		""" Number of items per request for the large resources (products,
+		stock, ...). None to read them with a single request """
+		return self._presta_api_page_size
+
+	@property
+	def presta_api_page_workers( self ):
+		""" Max number of pages downloaded at the same time """
+		return self._presta_api_page_workers
+
+	@property
+	def presta_api_pool_size( self ):
+		""" Max number of keep-alive connections to the WebShop """
+		return self._presta_api_pool_size
+
+	@property
+	def presta_api_timeout( self ):
+		""" Timeout (seconds) of the WebService requests. None to wait forever """
+		return self._presta_api_timeout
+
+	@property
+	def presta_api_stock_refresh( self ):
+		""" Seconds between two background refreshes of the stock quantities. 0 when disabled """
+		return self._presta_api_stock_refresh
+
+	@property
+	def presta_api_output_format( self ):
+		""" XML (default) or JSON, output format of the WebService list resources """
+		return self._presta_api_output_format
+
 	@property
 	def prompt( self ):
 		""" The prompt to be displayed in the front of command prompt """
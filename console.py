@@ -187,7 +187,10 @@ class BaseApp( object ):
 			self._batches = BatchFactory( storage_path = self.config.batch_path )
 
 		# A CachedPrestaHelper is a PrestaHelper with cache capabilities
-		self.cachedphelper = CachedPrestaHelper( self.config.presta_api_url, self.config.presta_api_key, debug = False, progressCallback = progressHandler )
+		self.cachedphelper = CachedPrestaHelper( self.config.presta_api_url, self.config.presta_api_key, debug = False, progressCallback = progressHandler, page_size = self.config.presta_api_page_size, page_workers = self.config.presta_api_page_workers, pool_size = self.config.presta_api_pool_size, timeout = self.config.presta_api_timeout, output_format = self.config.presta_api_output_format )
+		# Keep the stock quantities up to date in the background (optional)
+		if self.config.presta_api_stock_refresh > 0:
+			self.cachedphelper.start_stock_refresher( self.config.presta_api_stock_refresh )
 		# Force loading cache
 		#   cachedphelper.load_from_webshop()
 		# Update Stock quantities
@@ -465,6 +468,7 @@ COMMANDS = [
 	('print abort'    , 0   ),
 	('quit'           , 0   ),
 	('reload stock'   , 0   ),
+	('reload sync'    , 0   ),
 	('reload only'    , 0   ),
 	('reload'         , 0   ),
 	('save'           , 0   ),
@@ -502,6 +506,7 @@ class App( BaseApp ):
 						 'show-product-loc'  : '0',
 						 'inactive-product'  : '0',
 						 'include-it'        : '0',
+						 'live-stock'        : '0',
 						 'label-separator'   : '0',
 						 'print-landscape'   : '1',
 						 'print-cpi'         : '12',
@@ -516,43 +521,20 @@ class App( BaseApp ):
 
 	def __init_from_loaded_data( self ):
 		""" Initialize special parameters the loaded webshop data (file of WebShop) """
-		self.ID_SUPPLIER_PARAMS = None
-		self.ID_SUPPLIER_TARIFF = None
-
-		_item = self.cachedphelper.suppliers.supplier_from_name( "PARAMS" )
-		if _item != None:
-			self.ID_SUPPLIER_PARAMS = _item.id
-
-		_item = self.cachedphelper.suppliers.supplier_from_name( "TARIFF-CODE" )
-		if _item != None:
-			self.ID_SUPPLIER_TARIFF = _item.id
+		# the special suppliers are located by the cache (see CachedPrestaHelper.build_product_params)
+		self.ID_SUPPLIER_PARAMS = self.cachedphelper.id_supplier_params
+		self.ID_SUPPLIER_TARIFF = self.cachedphelper.id_supplier_tariff
 		print( 'ID_SUPPLIER_PARAMS : %s' % self.ID_SUPPLIER_PARAMS )
 		print( 'ID_SUPPLIER_TARIFF : %s' % self.ID_SUPPLIER_TARIFF )
+		# PARAMS & TARIFF-CODE are decoded once by the cache, report the errors here
+		for id_product, msg in self.cachedphelper.product_params_errors:
+			print( '[WARNING] id_product %s: %s' % (id_product, msg) )
 
 	def get_product_params( self, id_product ):
 		""" Locate the product parameter stored in the PARAMS supplier reference for that product.
-			The PARAMS supplier is encoded as follows:     param1:value1,param2:value2 """
-
-		# If this special PARAMS supplier is not yet identified then
-		#   not possible to locate the special product parameter
-		#   stored there
-		if self.ID_SUPPLIER_PARAMS == None:
-			return {}
-
-		reference = self.cachedphelper.product_suppliers.reference_for( id_product, self.ID_SUPPLIER_PARAMS )
-		# print( 'reference: %s' % reference )
-		if len(reference )==0:
-			return {}
-
-		result = {}
-		lst = reference.split(',')
-		for item in lst:
-			vals = item.split(':')
-			if len( vals )!= 2:
-				raise Exception( 'Invalid product PARAMS "%s" in "%s" for id_product %s. it must have 2 parts (colon separated!)' % (vals, reference,id_product) )
-			result[vals[0]] = vals[1]
-
-		return result
+			The PARAMS supplier is encoded as follows:     param1:value1,param2:value2
+			QM, QO are returned as int and SN as bool (see parse_product_params) """
+		return self.cachedphelper.product_params( id_product )
 
 	def get_product_param( self, id_product, param_name, as_bool=False, default=None ):
 		""" Return the value of a named parameter in the product PARAMS. Return the default value (None) is parameter is missing or not present.
@@ -563,7 +545,7 @@ class App( BaseApp ):
 		if not(param_name in _p):
 			return default
 		if as_bool:
-			return _p[param_name] in ('1','Y','y')
+			return _p[param_name] in (True,'1','Y','y')
 		else:
 			return _p[param_name]
 
@@ -572,23 +554,11 @@ class App( BaseApp ):
 		""" Locate the Tariff Code for the product stored into the TARIFF supplier reference for that product.
 			The PARAMS supplier is encoded as follows: country_ISO,tariff,weight """
 		assert type(id_product) is int, "is_product must be interger"
-		# If this special TARIFF supplier is not yet identified then
-		#   not possible to locate the special product parameter
-		#   stored there
-		if self.ID_SUPPLIER_TARIFF == None:
+		tariff = self.cachedphelper.product_tariff( id_product )
+		if tariff == None:
 			return (None,None,None)
-
-		tariff = self.cachedphelper.product_suppliers.reference_for( id_product, self.ID_SUPPLIER_TARIFF )
 		product = self.cachedphelper.products.product_from_id( id_product )
-		# print( 'id_product %s -> tariff: %s' % (type(id_product),tariff) )
-		if len(tariff)==0:
-			return (None,None,None)
-
-		lst = tariff.split(',')
-		if len( lst )!= 2:
-			raise Exception( 'Invalid product TARIFF "%s" for id_product %s. it must have 2 parts (country,tariff)' % (tariff, id_product) )
-
-		return (lst[0],lst[1],product.weight) # Country ISO Code, tariff_code
+		return (tariff[0],tariff[1],product.weight) # Country ISO Code, tariff_code
 
 	def get_qm_info( self, psr ):
 		""" generate the 'Quantity Minimum Warning' message for a given product.
@@ -650,6 +620,16 @@ class App( BaseApp ):
 		if len( psr_list )<=0:
 			return
 
+		# Refresh the stock quantities of the displayed products only
+		if self.options['live-stock'] == '1':
+			_ids = [ psr.product.id if isinstance( psr, ToteItem ) else psr.product_data.id for psr in psr_list ]
+			try:
+				self.cachedphelper.refresh_stock_for( _ids, [ psr for psr in psr_list if isinstance( psr, ProductSearchResult ) ] )
+			except Exception as err:
+				# WebService error or timeout: display the cached quantities
+				logging.warning( 'live-stock refresh failed: %s' % err )
+				print( '[WARNING] live-stock refresh failed, cached quantities displayed: %s' % err )
+
 		sTitle = ''
 		sPrint = ''
 		if isinstance( psr_list[0], ToteItem ):
@@ -682,19 +662,19 @@ class App( BaseApp ):
 		sPrint += ' | %-50s'
 
 
+		# ToteItems aren't ProductSearchResult, we will have to Mimic them!
+		# (all at once: the quantities come from the same stock snapshot)
+		if isinstance( psr_list[0], ToteItem ):
+			_psr_list = self.cachedphelper.psr_instances( [ _item.product for _item in psr_list ] )
+			for psr, _item in zip( _psr_list, psr_list ):
+				psr.ordered_qty = _item.qty # set the ordered qty from ToteBag
+			psr_list = _psr_list
+
 		self.output.writeln( sTitle )
 		self.output.writeln( '-'*len(sTitle))
 		_count = 0
 		for psr in  psr_list : # Returns a list of ProductSearchResult
 
-			# If it isn't a ProductSearchResult, we will have to Mimic it!
-			if isinstance( psr, ProductSearchResult ):
-				pass
-			elif isinstance( psr, ToteItem ):
-				_item = psr # remind old ToteItem reference
-				psr = self.cachedphelper.psr_instance( _item.product )
-				psr.ordered_qty = _item.qty # set the ordered qty from ToteBag
-
 			# --- prepare the data ---
 			try:
 				_lst = []
@@ -739,8 +719,9 @@ class App( BaseApp ):
 					_lst.append( psr.product_data.wholesale_price )
 				if self.options['show-product-pv'] == '1':
 					_lst.append( psr.product_data.price )
-					vat_rate = self.cachedphelper.get_tax_rate( psr.product_data.id_tax_rules_group, LOCAL_COUNTRY_ISO  )
-					psr.product_data.update_vat_rate( vat_rate )
+					if psr.product_data.vat_rate == None: # price TTC is cached by the product
+						vat_rate = self.cachedphelper.get_tax_rate( psr.product_data.id_tax_rules_group, LOCAL_COUNTRY_ISO  )
+						psr.product_data.update_vat_rate( vat_rate )
 					_lst.append( psr.product_data.price_ttc )
 				if self.options['show-product-ean'] == '1':
 					_lst.append( psr.product_data.ean13 )
@@ -1782,6 +1763,8 @@ class App( BaseApp ):
 
 		last_id = self.cachedphelper.get_lastorder_id()
 		orders = self.cachedphelper.get_last_orders( last_id, _count )
+		# read the customers with a few requests (then served by the customer cache)
+		self.cachedphelper.get_customers( [ order.id_customer for order in orders ] )
 		self.output.writeln( "%7s | %-5s | %-19s | %10s | %-20s | %-30s | %-20s " % ('id','valid','date','Tot.htva','Customer', 'Carrier', 'Statut') )
 		self.output.writeln( "-"*129 )
 		for order in orders:
@@ -1920,6 +1903,7 @@ class App( BaseApp ):
 
 	def do_quit( self, params ):
 		self.output.writeln( "User exit!")
+		self.cachedphelper.stop_stock_refresher()
 		sys.exit(0)
 
 	def do_reload( self,  params, auto_save = True ):
@@ -1935,6 +1919,14 @@ class App( BaseApp ):
 		""" Reload ALL the data from the WebShow (deactivate the auto save) """
 		self.reload( self, params, auto_save = False )
 
+	def do_reload_sync( self, params ):
+		""" Update the products changed on the WebShop since the last reload/sync + save the data """
+		self.output.writeln( 'Synchronizing the products with the WebShop...' )
+		_updated, _deleted = self.cachedphelper.sync_incremental()
+		self.output.writeln( '%i products updated, %i deleted' % (_updated, _deleted) )
+		self.__init_from_loaded_data() # reinit global variables
+		self.do_save( params )
+
 	def do_reload_stock( self, params ):
 		""" Reload the stock quantities only. """
 		self.output.writeln( 'Refreshing stock quantities...' )
@@ -2085,7 +2077,7 @@ class App( BaseApp ):
 		# PARAMS
 		_p = self.get_product_params( _id )
 		self.output.writeln( 'QM   ( QO ): %2s     ( %2s ) ' % ( _p['QM'] if 'QM' in _p else '---',  _p['QO'] if 'QO' in _p else '---' ) )
-		self.output.writeln( 'S/N status : %s' % ('have SERIAL NUMBER' if ('SN' in _p) and (_p['SN']=='Y') else 'no serial') )
+		self.output.writeln( 'S/N status : %s' % ('have SERIAL NUMBER' if ('SN' in _p) and _p['SN'] else 'no serial') )
 		self.output.writeln( 'UnrepeatQty: %s' % (p.unrepeatable_order_qty if p.unrepeatable_order_qty and p.unrepeatable_order_qty >= 0 else '---') )
 		self.output.writeln( 'Weight     : %6.3f Kg' % p.weight )
 		
@@ -2276,6 +2268,15 @@ class App( BaseApp ):
 		self.output.writeln( '%6i stock availables' % len( self.cachedphelper.stock_availables ) )
 		self.output.writeln( '%6i product suppliers available' % len( self.cachedphelper.product_suppliers ) )
 		self.output.writeln( '%6i last product id' % self.cachedphelper.products.last_id )
+		if self.cachedphelper.transport:
+			_metrics = self.cachedphelper.transport.metrics
+			self.output.writeln( '%6i HTTP requests (%i errors), avg %.3fs, p95 %.3fs, max %.3fs' % (_metrics.count, _metrics.errors, _metrics.average_time, _metrics.percentile(95), _metrics.max_time) )
+		_last = self.cachedphelper.last_stock_refresh
+		self.output.writeln( 'Last stock refresh: %s' % (_last.strftime( '%d/%m/%y %H:%M:%S' ) if _last else 'never') )
+		if self.cachedphelper.stock_refresh_interval:
+			self.output.writeln( 'Stock refreshed in background every %is' % self.cachedphelper.stock_refresh_interval )
+		if self.cachedphelper.stock_refresh_error:
+			self.output.writeln( 'Last background stock refresh failed: %s' % self.cachedphelper.stock_refresh_error )
 
 	def do_upgrade( self, params ):
 		""" Just upgrade the software from GitHub depot. """
@@ -60,9 +60,6 @@ logging.basicConfig( filename=config.logfile, level=logging.DEBUG,
 	format='%(asctime)s - [%(levelname)s] %(message)s',
 	datefmt='%d/%m/%y %H:%M:%S.%f' )
 
-# LABEL Size is stored into the article reference of the "PARAMS" supplier.
-ID_SUPPLIER_PARAMS = None
-
 
 def list_products( cachedphelper, key ):
 	""" Search for a product base on its partial reference code + list them """
@@ -124,34 +121,8 @@ def export_to_xmltree( lst , decimal_separator=',' ):
 def get_product_params_dic( cachedpHelper,id_product ):
 	""" Locate the product parameter stored in the PARAMS supplier
 	    reference on the product. The reference is coded as follow
-	    param1:value1,param2:value2 """
-
-	# If this special PARAMS supplier is not yet identified then
-	#   not possible to locate the special product parameter
-	#   stored there
-	if ID_SUPPLIER_PARAMS == None:
-		return {}
-
-	reference = ''
-	try:
-		reference = cachedpHelper.product_suppliers.reference_for( id_product, ID_SUPPLIER_PARAMS )
-		# print( 'reference: %s' % reference )
-		if len(reference )==0:
-			return {}
-
-		result = {}
-		lst = reference.split(',')
-		for item in lst:
-			vals = item.split(':')
-			if len( vals )!= 2:
-				raise Exception( 'a parameter must have 2 parts!' )
-			result[vals[0]] = vals[1]
-
-		return result
-
-	except Exception as e:
-		print( 'Error while processing param %s with message %s ' % (reference,str(e)) )
-		return {}
+	    param1:value1,param2:value2 (decoded once by the cache) """
+	return cachedpHelper.product_params( id_product )
 
 def build_inventory_list( cachedphelper ):
 	r = []
@@ -192,16 +163,6 @@ def main():
 		else:
 			print( '%i/%i - %s' % ( prestaProgressEvent.current_step, prestaProgressEvent.max_step, prestaProgressEvent.msg ) )
 
-	def initialize_globals():
-		""" Initialize the global var @ startup or @ reload """
-		global ID_SUPPLIER_PARAMS
-		_item = cachedphelper.suppliers.supplier_from_name( "PARAMS" )
-		#for _item in cachedphelper.suppliers:
-		#	print( '%i - %s' % (_item.id,_item.name) )
-		if _item != None:
-			ID_SUPPLIER_PARAMS = _item.id
-			print( 'Catched PARAMS supplier :-). ID: %i' % ID_SUPPLIER_PARAMS )
-
     # A CachedPrestaHelper is a PrestaHelper with cache capabilities
 	cachedphelper = CachedPrestaHelper( config.presta_api_url, config.presta_api_key, debug = False, progressCallback = progressHandler )
 	# Force loading cache
@@ -220,9 +181,9 @@ def main():
 	print( '#categories = %i' % len( cachedphelper.categories ) )
 	print( '#stock availables = %i' % len( cachedphelper.stock_availables ) )
 	print( '#product suppliers available = %i' % len( cachedphelper.product_suppliers ) )
+	print( 'PARAMS id_supplier = %s' % cachedphelper.id_supplier_params )
 	print( '******************************************************************' )
 	print( '' )
-	initialize_globals()
 	help()
 
 	#print('mise à jour des qty' )
@@ -248,7 +209,6 @@ def main():
 				if cmd == 'r':
 					print( 'Contacting WebShop and reloading...' )
 					cachedphelper.load_from_webshop()
-					initialize_globals() # reinit global variables
 				if cmd == 'e':
 					# export the inventory list
 					lst = build_inventory_list( cachedphelper )
@@ -146,11 +146,13 @@ def main():
 				# Activate LCD when receiving a new payment 
 				setLcdColor( lcd, cachedHelper, last_orders_data[0] )
 				lcd.activate_lcd( bNewPayment )
-				paid_count = len( cachedHelper.get_order_ids( cachedHelper.order_states.ORDER_STATE_PAID ) )
-				bankwire_count = len( cachedHelper.get_order_ids( cachedHelper.order_states.ORDER_STATE_WAIT_BANKWIRE ) )
+				# states of the 25 last orders in one request
+				last_states = [ current_state for id_order, current_state in cachedHelper.get_order_current_states() ]
+				paid_count = last_states.count( cachedHelper.order_states.ORDER_STATE_PAID )
+				bankwire_count = last_states.count( cachedHelper.order_states.ORDER_STATE_WAIT_BANKWIRE )
 				# Also add the "Paiement par carte sur place" in Bankwire count
 				if PAY_AT_MCH:
-					bankwire_count += len( cachedHelper.get_order_ids(PAY_AT_MCH))
+					bankwire_count += last_states.count( PAY_AT_MCH )
 
 				last_update_time = time.time()
 			else: 
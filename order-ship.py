@@ -79,12 +79,9 @@ re_add_remove_several_id = re.compile( RE_ADD_REMOVE_SEVERAL_ID )
 
 class OrderShipApp():
 	def __init__( self ):
-		self.ID_SUPPLIER_PARAMS = None
 		self.config = Config()
 		self.h = CachedPrestaHelper( self.config.presta_api_url, self.config.presta_api_key, debug= False )
-		_item = self.h.suppliers.supplier_from_name( "PARAMS" )
-		if _item != None:
-			self.ID_SUPPLIER_PARAMS = _item.id
+		self.ID_SUPPLIER_PARAMS = self.h.id_supplier_params
 		self.output = PrestaOut()
 		self.serials = SerialNumberLog()
 		self.state  = AppState.WAIT_ORDER
@@ -133,30 +130,9 @@ class OrderShipApp():
 
 	def get_product_params( self, id_product ):
 		""" Locate the product parameter stored in the PARAMS supplier reference for that product.
-			The PARAMS supplier is encoded as follows:     param1:value1,param2:value2 """
-
-		# If this special PARAMS supplier is not yet identified then
-		#   not possible to locate the special product parameter
-		#   stored there
-		if self.ID_SUPPLIER_PARAMS == None:
-			return {}
-
-		reference = self.h.product_suppliers.reference_for( id_product, self.ID_SUPPLIER_PARAMS )
-		#print('id_product = %i' % id_product)
-		#print( 'ID_SUPPLIER_PARAMS = %i' %  self.ID_SUPPLIER_PARAMS )
-		#print( 'get_product_params: reference: %s' % reference )
-		if len(reference )==0:
-			return {}
-
-		result = {}
-		lst = reference.split(',')
-		for item in lst:
-			vals = item.split(':')
-			if len( vals )!= 2:
-				raise Exception( 'Invalid product PARAMS "%s" in "%s" for id_product %s. it must have 2 parts (colon separated!)' % (vals, reference,id_product) )
-			result[vals[0]] = vals[1]
-
-		return result
+			The PARAMS supplier is encoded as follows:     param1:value1,param2:value2
+			QM, QO are returned as int and SN as bool (see parse_product_params) """
+		return self.h.product_params( id_product )
 
 	def get_product_param( self, id_product, param_name, as_bool=False, default=None ):
 		""" Return the value of a named parameter in the product PARAMS. Return the default value (None) is parameter is missing or not present.
@@ -170,7 +146,7 @@ class OrderShipApp():
 			else:
 				return default
 		if as_bool:
-			return _p[param_name] in ('1','Y','y')
+			return _p[param_name] in (True,'1','Y','y')
 		else:
 			return _p[param_name]
 
@@ -222,6 +198,8 @@ class OrderShipApp():
 				_cmd_type = CMD.RAW
 				_cmd_data = v
 			else:
+				if len(_lst)>1:
+					self.output.writeln( '[WARNING] duplicate EAN %s for %s' % (v, ', '.join( [ _p.reference for _p in _lst ] )) )
 				_cmd_type = CMD.SCAN_PRODUCT
 				_cmd_data = _lst[0].id
 		elif _ean_type == EanType.ORDER:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+"""output-format-bench.py
+
+Compare the XML and JSON output format of the PrestaShop WebService for
+the resources loaded by CachedPrestaHelper.load_from_webshop().
+
+For each format, the script calls the PrestaHelper.get_xxx() used by the
+cache then downloads again the requested urls to report the payload size,
+the download time and the decode time (ElementTree for XML, json +
+json_to_etree for JSON). The peak memory of the getter is also reported:
+in XML the large resources are streamed (see PrestaHelper.iter_search).
+
+  python3 output-format-bench.py
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+MA 02110-1301, USA.
+"""
+
+from prestaapi import PrestaHelper, JSON_RESOURCE_ITEM_TAGS, json_to_etree
+from xml.etree import ElementTree
+from config import Config
+import logging
+import tracemalloc
+import time
+import json
+
+config = Config()
+logging.basicConfig( filename=config.logfile, level=logging.DEBUG,
+	format='%(asctime)s - [%(levelname)s] %(message)s',
+	datefmt='%d/%m/%y %H:%M:%S.%f' )
+
+# the getters called by CachedPrestaHelper.load_from_webshop()
+CACHE_GETTERS = [ 'get_configurations', 'get_carriers', 'get_order_states', 'get_products',
+	'get_product_locations', 'get_suppliers', 'get_categories', 'get_stockavailables',
+	'get_product_suppliers', 'get_countries', 'get_taxes', 'get_tax_rules',
+	'get_tax_rule_groups', 'get_movement_reasons' ]
+
+def record_urls( helper, getter ):
+	""" Call the getter of the helper. Returns (time, peak memory, requested urls) """
+	client = helper.webservice.client
+	urls = []
+	_request = client.request
+	def request( method, url, *args, **kwargs ):
+		urls.append( url )
+		return _request( method, url, *args, **kwargs )
+	client.request = request
+	tracemalloc.start()
+	try:
+		start = time.time()
+		getattr( helper, getter )()
+		return ( time.time()-start, tracemalloc.get_traced_memory()[1], urls )
+	finally:
+		tracemalloc.stop()
+		client.request = _request
+
+def measure( helper, url ):
+	""" Download the url and decode it. Returns (size, download_time, decode_time) """
+	start = time.time()
+	response = helper.webservice.client.get( url )
+	download = time.time()-start
+
+	start = time.time()
+	if 'output_format=JSON' in url:
+		resource = url.split('?')[0].rstrip('/').split('/')[-1]
+		json_to_etree( json.loads( response.content.decode('utf-8') ), resource, JSON_RESOURCE_ITEM_TAGS[resource] )
+	else:
+		ElementTree.fromstring( response.content )
+	decode = time.time()-start
+	return ( len(response.content), download, decode )
+
+def main():
+	helper = PrestaHelper( config.presta_api_url, config.presta_api_key, debug = False, output_format = 'JSON' )
+	if helper.output_format != 'JSON':
+		print( 'PrestaShop %r does not support output_format=JSON' % (helper.prestashop_version,) )
+		return 1
+
+	totals = {}
+	print( '%-22s %-5s %10s %9s %9s %9s %8s' % ('getter', 'fmt', 'bytes', 'download', 'decode', 'getter', 'peak MB') )
+	for getter in CACHE_GETTERS:
+		for output_format in ('XML', 'JSON'):
+			helper.output_format = output_format
+			getter_time, peak, urls = record_urls( helper, getter )
+			size, download, decode = 0, 0.0, 0.0
+			for url in urls:
+				_size, _download, _decode = measure( helper, url )
+				size += _size
+				download += _download
+				decode += _decode
+			print( '%-22s %-5s %10i %8.2fs %8.2fs %8.2fs %8.1f' % (getter, output_format, size, download, decode, getter_time, peak/1048576.0) )
+			_total = totals.setdefault( output_format, [0, 0.0, 0.0, 0.0, 0.0] )
+			_total[4] = max( _total[4], peak/1048576.0 ) # highest peak
+			for i, value in enumerate( (size, download, decode, getter_time) ):
+				_total[i] += value
+	for output_format, _total in totals.items():
+		print( '%-22s %-5s %10i %8.2fs %8.2fs %8.2fs %8.1f' % tuple( ['TOTAL', output_format] + _total ) )
+	return 0
+
+if __name__ == '__main__':
+	main()
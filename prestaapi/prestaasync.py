@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""prestaasync.py - asyncio front-end of PrestaHelper (Python 3 only).
+
+	AsyncPrestaHelper exposes every public method of a PrestaHelper (or
+	CachedPrestaHelper) as a coroutine with the same arguments. The blocking
+	WebService calls are run on a pool of max_concurrency threads so that
+	fan-out operations run concurrently from a single event loop:
+
+		from prestaapi.prestaasync import AsyncPrestaHelper
+		ahelper = AsyncPrestaHelper( helper, max_concurrency=8 )
+		rows = ahelper.run_sync( ahelper.get_last_orders_with_customers( last_id, 100 ) )
+
+	The synchronous helper stays available as ahelper.helper for the
+	existing scripts.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+
+class AsyncPrestaHelper( object ):
+	""" Run the PrestaHelper methods as coroutines (at most max_concurrency
+		WebService calls at the same time) """
+
+	def __init__( self, helper, max_concurrency = 8 ):
+		self.helper = helper
+		if not helper.thread_safe:
+			max_concurrency = 1 # prestapyt < 0.8: the WebService cannot be shared
+		self.max_concurrency = max_concurrency
+		self.__executor = ThreadPoolExecutor( max_workers=max_concurrency )
+
+	def __getattr__( self, name ):
+		""" helper.get_xxx( ... ) becomes 'await self.get_xxx( ... )' """
+		attr = getattr( self.helper, name )
+		if name.startswith( '_' ) or not callable( attr ):
+			return attr
+		async def call( *args, **kwargs ):
+			return await self.run( attr, *args, **kwargs )
+		call.__name__ = name
+		call.__doc__ = attr.__doc__
+		return call
+
+	async def run( self, func, *args, **kwargs ):
+		""" Run the blocking func( *args, **kwargs ) on the thread pool """
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor( self.__executor, partial( func, *args, **kwargs ) )
+
+	async def get_customers_by_id( self, ids ):
+		""" Read the customers (see PrestaHelper.get_customers). Returns a dic id_customer -> CustomerData """
+		customers = await self.get_customers( ids )
+		return dict( [ (int(customer.id), customer) for customer in customers ] )
+
+	async def get_last_orders_with_customers( self, fromId, count=1 ):
+		""" Same as PrestaHelper.get_last_orders() with the chunks of orders
+			read concurrently then their customers read with get_customers().
+
+		Returns:
+		A list of (OrderData, CustomerData) from fromId (counting down)
+		"""
+		ids = [ fromId-i for i in range( count ) if fromId-i > 0 ]
+		chunk = self.helper.IDS_CHUNK_SIZE
+		_orders = await asyncio.gather( *[ self.get_orders( ids[i:i+chunk] ) for i in range( 0, len(ids), chunk ) ] )
+		_orders = [ order for orders in _orders for order in orders ]
+		customers = await self.get_customers_by_id( [ order.id_customer for order in _orders ] )
+		return [ (order, customers.get( order.id_customer )) for order in _orders ]
+
+	def run_sync( self, coroutine ):
+		""" Sync wrapper: run the coroutine on a new event loop and return its result """
+		loop = asyncio.new_event_loop()
+		try:
+			return loop.run_until_complete( coroutine )
+		finally:
+			loop.close()
+
+	def close( self ):
+		""" Stop the threads of the pool """
+		self.__executor.shutdown( wait=True )
@@ -10,15 +10,40 @@ Copyright 2014 MC Hobby SPRL, All right reserved
 
 from prestapyt import PrestaShopWebServiceError, PrestaShopWebService
 from xml.etree import ElementTree # --> print( ElementTree.tostring( el ) )
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 from pprint import pprint
 import logging
 import pickle
 import os.path
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import reduce
+from bisect import bisect_left
+import unicodedata
+import re
+import json
+import time
+import threading
+try:
+	from concurrent.futures import ThreadPoolExecutor, as_completed
+except ImportError: # Python 2 without the futures backport: pages and resources are read one by one
+	ThreadPoolExecutor = None
+try:
+	import requests
+	from requests.adapters import HTTPAdapter
+except ImportError: # prestapyt before 0.8 (httplib2) does not need requests, no PrestaSession
+	requests = None
 
 PRESTA_UNDEFINE_INT = -1
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+# Tag of the items for the list resources that can be read with output_format=JSON
+# (the JSON responses only contains the name of the resource)
+JSON_RESOURCE_ITEM_TAGS = { 'carriers' : 'carrier', 'categories' : 'category', 'combinations' : 'combination',
+	'configurations' : 'configuration', 'countries' : 'country', 'order_states' : 'order_state',
+	'products' : 'product', 'product_suppliers' : 'product_supplier', 'stock_availables' : 'stock_available',
+	'stock_movement_reasons' : 'stock_movement_reason', 'suppliers' : 'supplier', 'taxes' : 'tax',
+	'tax_rules' : 'tax_rule', 'tax_rule_groups' : 'tax_rule_group',
+	'warehouse_product_locations' : 'warehouse_product_location' }
 
 
 def save_to_file( base_name, el ):
@@ -80,6 +105,41 @@ def extract_hashtext( item, default_lang_id='2' ):
 		else:
 			return ''
 
+def extract_language_text( node, default_lang_id='2' ):
+	""" Same as extract_hashtext() but directly from the XML node (eg: <name>).
+		Returns the text of the single <language> child (monolingual) or the
+		one of the default_lang_id (multilingual). """
+	languages = node.findall( 'language' )
+	if len( languages )==1:
+		return languages[0].text
+	for language in languages:
+		if language.get( 'id' ) == default_lang_id:
+			return language.text
+	return ''
+
+def json_to_etree( data, resource, item_tag ):
+	""" Build the ElementTree of the XML response from the decoded output_format=JSON
+		response of a list resource, so the list loaders read both formats.
+		eg: {'taxes': [{'id': 1, 'rate': '21.000'}]} --> <prestashop><taxes><tax><id>1</id>... """
+	root = ElementTree.Element( 'prestashop' )
+	container = ElementTree.SubElement( root, resource )
+	if not isinstance( data, dict ): # empty result is returned as []
+		return root
+	for item in data.get( resource, [] ):
+		node = ElementTree.SubElement( container, item_tag )
+		for key, value in item.items():
+			child = ElementTree.SubElement( node, key )
+			if isinstance( value, list ): # multilingual: [{'id': '1', 'value': 'Nom'}, ...]
+				for label in value:
+					language = ElementTree.SubElement( child, 'language', id='%s' % label['id'] )
+					language.text = label['value']
+			elif value != None:
+				child.text = '%s' % value
+				# references to other resources have a xlink:href in the XML (when assigned)
+				if key.startswith( 'id_' ) and (child.text != '0'):
+					child.set( XLINK_HREF, '' )
+	return root
+
 def ean13_checksum(ean_base):
 	"""Calculates the checksum for EAN13-Code.
 	   special thanks to python-barcode
@@ -115,26 +175,298 @@ def canonical_search_string( sText ):
 	__s = __s.replace( '-', '' );
 	return __s.upper()
 
+def fold_text( sText ):
+	""" Return the upper case text without the accents (Résistance -> RESISTANCE) """
+	if sText == None:
+		return ''
+	if isinstance( sText, bytes ):
+		# Python 2: ElementTree returns str for ASCII text and raw_input() returns encoded str
+		sText = sText.decode( 'utf-8', 'replace' )
+	__s = unicodedata.normalize( 'NFKD', sText )
+	__s = ''.join( [ c for c in __s if not unicodedata.combining( c ) ] )
+	return __s.upper()
+
+PARAMS_INT_NAMES  = ( 'QM', 'QO' ) # Quantity Minimum, Quantity to Order
+PARAMS_BOOL_NAMES = ( 'SN', )      # Serial Number
+
+def parse_product_params( reference ):
+	""" Decode the PARAMS supplier reference (param1:value1,param2:value2) of a product.
+		QM, QO are converted to int, SN to bool. Other parameters are kept as string.
+
+		Returns:
+			tuple (params_dic, errors) where errors is the list of error messages """
+	result = {}
+	errors = []
+	if len( reference )==0:
+		return (result, errors)
+	for item in reference.split(','):
+		vals = item.split(':')
+		if len( vals )!= 2:
+			errors.append( 'Invalid product PARAMS "%s" in "%s". it must have 2 parts (colon separated!)' % (item, reference) )
+			continue
+		name, value = vals
+		if name in PARAMS_INT_NAMES:
+			try:
+				value = int( value )
+			except ValueError:
+				# keep the string, caller will see an invalid value
+				errors.append( 'Invalid integer for %s in product PARAMS "%s"' % (name, reference) )
+		elif name in PARAMS_BOOL_NAMES:
+			value = value in ('1','Y','y')
+		result[name] = value
+	return (result, errors)
+
+class WordIndex( object ):
+	""" Inverted word index over labels (accent folded, see fold_text).
+
+	search() returns the values (in registration order) where each word of
+	the searched text is the prefix of a word of the label. """
+	RE_WORD = re.compile( r'\w+', re.UNICODE )
+
+	def __init__( self ):
+		self.clear()
+
+	def __len__( self ):
+		return len( self.__values )
+
+	def clear( self ):
+		self.__values   = [] # registered values
+		self.__postings = {} # word -> [position in __values, ...]
+		self.__words    = None # sorted list of words (for prefix search), computed on demand
+
+	def words( self, sText ):
+		""" Split a text into its folded words """
+		return self.RE_WORD.findall( fold_text( sText ) )
+
+	def add( self, text, value ):
+		""" Register a value for the label text """
+		_pos = len( self.__values )
+		self.__values.append( value )
+		for word in set( self.words( text ) ):
+			if not( word in self.__postings ):
+				self.__postings[word] = []
+				self.__words = None
+			self.__postings[word].append( _pos )
+
+	def __prefixed_positions( self, prefix ):
+		""" Set of positions having a word starting with prefix """
+		if self.__words == None:
+			self.__words = sorted( self.__postings.keys() )
+		_result = set()
+		i = bisect_left( self.__words, prefix )
+		while (i < len(self.__words)) and self.__words[i].startswith( prefix ):
+			_result.update( self.__postings[ self.__words[i] ] )
+			i += 1
+		return _result
+
+	def search( self, sText ):
+		""" Return the values where every word of sText prefixes a word of the label """
+		_words = self.words( sText )
+		if len( _words )==0:
+			return list( self.__values )
+		_positions = None
+		for word in sorted( set(_words), key=len, reverse=True ): # longest word is the most selective
+			_found = self.__prefixed_positions( word )
+			_positions = _found if _positions == None else (_positions & _found)
+			if len( _positions )==0:
+				return []
+		return [ self.__values[pos] for pos in sorted( _positions ) ]
+
+class NGramIndex( object ):
+	""" Substring index (trigrams) over already canonicalized strings.
+
+	search() returns the values in the registration order, exactly like
+	a linear scan testing `text.find( sToFind )>=0` would do. """
+	N = 3
+
+	def __init__( self ):
+		self.clear()
+
+	def __len__( self ):
+		return len( self.__entries )
+
+	def clear( self ):
+		self.__entries  = [] # list of (text, value)
+		self.__postings = {} # ngram -> [position in __entries, ...]
+
+	def add( self, text, value ):
+		""" Register a value for the (canonical) text """
+		_pos = len( self.__entries )
+		self.__entries.append( (text, value) )
+		for ngram in set( [ text[i:i+self.N] for i in range( len(text)-self.N+1 ) ] ):
+			self.__postings.setdefault( ngram, [] ).append( _pos )
+
+	def search( self, sToFind ):
+		""" Return the values having sToFind (canonical string) inside their text """
+		if len( sToFind ) < self.N:
+			# too short to use the postings --> check every entry
+			_positions = range( len(self.__entries) )
+		else:
+			_ngrams = set( [ sToFind[i:i+self.N] for i in range( len(sToFind)-self.N+1 ) ] )
+			_postings = sorted( [ self.__postings.get( ngram, [] ) for ngram in _ngrams ], key=len )
+			# intersect the postings (starting from the shortest one keeps the order)
+			_positions = _postings[0]
+			for _posting in _postings[1:]:
+				if len( _positions )==0:
+					break
+				_posting = set( _posting )
+				_positions = [ pos for pos in _positions if pos in _posting ]
+		# the ngrams may match at different places --> confirm the substring
+		_result = []
+		for pos in _positions:
+			text, value = self.__entries[pos]
+			if text.find( sToFind )>=0:
+				_result.append( value )
+		return _result
+
+
+class RequestMetrics( object ):
+	""" Latency statistics of the HTTP requests (thread safe). The last
+		keep requests are kept for the percentiles. """
+	def __init__( self, keep=1000 ):
+		self.__lock = threading.Lock()
+		self.__keep = keep
+		self.reset()
+
+	def reset( self ):
+		with self.__lock:
+			self.count = 0
+			self.errors = 0 # no response (timeout, connection error)
+			self.total_time = 0.0
+			self.max_time = 0.0
+			self.recent = deque( maxlen=self.__keep ) # (method, url, status_code, elapsed)
+
+	def add( self, method, url, status_code, elapsed ):
+		with self.__lock:
+			self.count += 1
+			if status_code == None:
+				self.errors += 1
+			self.total_time += elapsed
+			self.max_time = max( self.max_time, elapsed )
+			self.recent.append( (method, url, status_code, elapsed) )
+
+	@property
+	def average_time( self ):
+		return (self.total_time / self.count) if self.count else 0.0
+
+	def percentile( self, pct ):
+		""" Latency under which pct % of the recent requests completed """
+		with self.__lock:
+			_times = sorted( [ _item[3] for _item in self.recent ] )
+		if not _times:
+			return 0.0
+		return _times[ min( len(_times)-1, int( len(_times)*pct/100.0 ) ) ]
+
+class LRUCache( object ):
+	""" Dictionnary of at most maxsize entries (the least recently used are
+		dropped) where the entries expire ttl seconds after their insertion.
+		Thread safe. """
+	def __init__( self, maxsize=1000, ttl=600 ):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.__lock = threading.Lock()
+		self.__entries = OrderedDict() # key -> (expiration time, value), most recent at the end
+
+	def __len__( self ):
+		return len( self.__entries )
+
+	def get( self, key, default=None ):
+		with self.__lock:
+			if not key in self.__entries:
+				return default
+			expire, value = self.__entries.pop( key )
+			if expire < time.time():
+				return default
+			self.__entries[key] = (expire, value) # most recently used
+			return value
+
+	def put( self, key, value ):
+		with self.__lock:
+			self.__entries.pop( key, None )
+			self.__entries[key] = (time.time()+self.ttl, value)
+			while len( self.__entries ) > self.maxsize:
+				self.__entries.popitem( last=False )
+
+	def clear( self ):
+		with self.__lock:
+			self.__entries.clear()
+
+if requests != None:
+	class PrestaSession( requests.Session ):
+		""" requests Session given to the PrestaShopWebService: keep-alive
+			connections pooled per host (pool_size), gzip/deflate compression,
+			default timeout (seconds or (connect, read) tuple) and latency
+			metrics. The latency is the time to the response headers
+			(response.elapsed) for every request, streamed or not; for a failed
+			request it is the time until the failure. """
+		def __init__( self, pool_size=10, timeout=None ):
+			requests.Session.__init__( self )
+			adapter = HTTPAdapter( pool_connections=pool_size, pool_maxsize=pool_size )
+			self.mount( 'https://', adapter )
+			self.mount( 'http://', adapter )
+			self.headers['Accept-Encoding'] = 'gzip, deflate'
+			self.headers['Connection'] = 'keep-alive'
+			self.timeout = timeout
+			self.metrics = RequestMetrics()
+
+		def request( self, method, url, *args, **kwargs ):
+			if kwargs.get( 'timeout' ) == None:
+				kwargs['timeout'] = self.timeout
+			start = time.time()
+			try:
+				response = requests.Session.request( self, method, url, *args, **kwargs )
+			except:
+				self.metrics.add( method, url, None, time.time()-start )
+				raise
+			self.metrics.add( method, url, response.status_code, response.elapsed.total_seconds() )
+			return response
+else:
+	PrestaSession = None
 
 class PrestaHelper(object):
 	"""Helper class to obtain structured information from
 	   prestashop API"""
 	__prestashop = None
+	__transport = None
 	__prestashop_api_access = {'url' : None, 'key' : None }
 	prestashop_version = None
+	output_format = 'XML' # 'JSON' when asked and supported by the shop, see search()
+	page_size = None # read the large resources by pages of page_size items, see iter_search()
+	page_workers = 4 # max pages downloaded at the same time
+	IDS_CHUNK_SIZE = 50 # ids per filter[id]=[a|b|...] request, see iter_search_ids()
 
-	def __init__( self, presta_api_url, presta_api_key, debug = __debug__ ):
-		""" constructor with connection parameter to PrestaShop API. """
+	def __init__( self, presta_api_url, presta_api_key, debug = __debug__, page_size = None, page_workers = 4, pool_size = 10, timeout = None, output_format = 'XML' ):
+		""" constructor with connection parameter to PrestaShop API.
+			page_size (None for a single request) and page_workers apply to the large
+			resources, see iter_search(). pool_size and timeout configure the
+			HTTP session, see PrestaSession. output_format='JSON' reads the list
+			resources as JSON when the shop supports it, see search() """
 		# Keep track of parameters
 		self.__prestashop_api_access['url'] = presta_api_url
 		self.__prestashop_api_access['key'] = presta_api_key
+		self.page_size = page_size
+		self.page_workers = page_workers
 
 		logging.info( 'connecting Presta API @ %s...', (presta_api_url) )
-		self.__prestashop = PrestaShopWebService( presta_api_url, presta_api_key )
+		if PrestaSession != None:
+			try:
+				transport = PrestaSession( pool_size=pool_size, timeout=timeout )
+				self.__prestashop = PrestaShopWebService( presta_api_url, presta_api_key, session=transport )
+				self.__transport = transport
+			except TypeError: # prestapyt before 0.8 has no session parameter
+				pass
+		if self.__transport == None:
+			self.__prestashop = PrestaShopWebService( presta_api_url, presta_api_key )
 
 		self.__debug = debug
 		self.__prestashop.debug = debug
 		self.prestashop_version = self.get_prestashop_version()
+		# PrestaShop 1.7 can return JSON (requires prestapyt with requests session)
+		if output_format == 'JSON':
+			if (self.prestashop_version_nr >= 107) and hasattr( self.__prestashop, 'client' ):
+				self.output_format = 'JSON'
+			else:
+				logging.warning( 'output_format=JSON not supported by PrestaShop %s or prestapyt, XML is used' % self.prestashop_version )
 
 	@property
 	def debug( self ):
@@ -150,6 +482,17 @@ class PrestaHelper(object):
 		""" Direct access to the underlying WebService (if needed). """
 		return self.__prestashop
 
+	@property
+	def transport( self ):
+		""" The PrestaSession of the WebService (None with prestapyt < 0.8) """
+		return self.__transport
+
+	@property
+	def thread_safe( self ):
+		""" True when the WebService can be called from several threads at the same
+			time. The httplib2 connection of prestapyt < 0.8 cannot be shared. """
+		return self.__transport != None
+
 	def search( self, pattern, options ):
 		""" Giving access to search capability of underlaying PrestaShop WebService """
 
@@ -159,8 +502,140 @@ class PrestaHelper(object):
 		# See source:
 		#    http://doc.prestashop.com/display/PS14/Chapter+8+-+Advanced+Use
 		#
+		# The list resources are read as JSON when the output_format allows it.
+		# The result is always an ElementTree.
+		if (self.output_format == 'JSON') and (pattern in JSON_RESOURCE_ITEM_TAGS):
+			el = self.__search_json( pattern, options )
+			if el != None:
+				return el
 		return self.__prestashop.search( pattern, options = options )
 
+	def __search_json( self, pattern, options ):
+		""" search() with output_format=JSON. Returns the equivalent ElementTree or
+			None if the shop does not answer JSON (then XML is used from now on) """
+		ws = self.__prestashop
+		ws._validate_query_options( options )
+		_options = dict( options )
+		_options['output_format'] = 'JSON'
+		url = "%s%s?%s" % (ws._api_url, pattern, ws._options_to_querystring( _options ))
+		response = ws.client.get( url )
+		if response.status_code != 200:
+			ws._check_status_code( response.status_code, response.content ) # raise the error
+		try:
+			data = json.loads( response.content.decode( 'utf-8' ) )
+		except ValueError:
+			logging.warning( 'output_format=JSON not supported for %s, switch back to XML' % pattern )
+			self.output_format = 'XML'
+			return None
+		return json_to_etree( data, pattern, JSON_RESOURCE_ITEM_TAGS[pattern] )
+
+	def iter_search( self, pattern, options, item_tag ):
+		""" Same as search() but the HTTP response is parsed while it is downloaded.
+			Yields each <item_tag> node, the node is dropped from the tree once
+			the consumer asks for the next one to keep the memory usage low.
+			With a page_size, the items are read by pages (see iter_pages).
+
+			Example: iter_search( 'products', {'display':'[id,reference]'}, 'product' ) """
+		if self.page_size:
+			for node in self.iter_pages( pattern, options, item_tag ):
+				yield node
+			return
+
+		ws = self.__prestashop
+		# Always XML: a JSON payload cannot be parsed while it is downloaded.
+		# No streaming for prestapyt without requests session.
+		if not hasattr( ws, 'client' ):
+			el = self.search( pattern, options )
+			for node in el.iterfind( '*/%s' % item_tag ):
+				yield node
+			return
+
+		ws._validate_query_options( options )
+		url = "%s%s?%s" % (ws._api_url, pattern, ws._options_to_querystring( options ))
+		response = ws.client.get( url, stream=True )
+		try:
+			if response.status_code != 200:
+				ws._check_status_code( response.status_code, response.content ) # raise the error
+			response.raw.decode_content = True # gzip, deflate
+			_parents = []
+			for event, node in ElementTree.iterparse( response.raw, events=('start','end') ):
+				if event == 'start':
+					_parents.append( node )
+					continue
+				_parents.pop()
+				if node.tag == item_tag:
+					yield node
+					# the node is the last child of its parent
+					_parents[-1].remove( node )
+		finally:
+			response.close()
+
+	def iter_pages( self, pattern, options, item_tag ):
+		""" Read the resource by pages of page_size items (limit=offset,count) sorted
+			by id. Up to page_workers pages are downloaded at the same time, the
+			<item_tag> nodes are yielded in id order. """
+		def read_page( offset ):
+			_options = dict( options )
+			_options['limit'] = '%i,%i' % (offset, self.page_size)
+			_options['sort'] = '[id_ASC]'
+			el = self.search( pattern, _options )
+			return list( el.iterfind( '*/%s' % item_tag ) )
+
+		if (ThreadPoolExecutor == None) or (self.page_workers < 2) or not self.thread_safe:
+			offset = 0
+			while True:
+				nodes = read_page( offset )
+				for node in nodes:
+					yield node
+				if len( nodes ) < self.page_size: # last page
+					return
+				offset += self.page_size
+
+		pool = ThreadPoolExecutor( max_workers=self.page_workers )
+		try:
+			pending = deque() # pages in offset order
+			offset = 0
+			last_page = False
+			while not last_page:
+				while len( pending ) < self.page_workers:
+					pending.append( pool.submit( read_page, offset ) )
+					offset += self.page_size
+				nodes = pending.popleft().result()
+				for node in nodes:
+					yield node
+				last_page = len( nodes ) < self.page_size
+		finally:
+			for future in pending: # pages after the last one
+				future.cancel()
+			pool.shutdown( wait=True )
+
+	def iter_search_ids( self, pattern, ids, options, item_tag, field='id' ):
+		""" Read the items of the given ids with filter[id]=[a|b|...] requests
+			of IDS_CHUNK_SIZE ids. Yields the <item_tag> nodes (unknown ids are
+			skipped, the nodes are not in the order of ids).
+			field allows to filter on another id (eg: id_product) """
+		ids = sorted( set( [ int(id) for id in ids ] ) )
+		for i in range( 0, len(ids), self.IDS_CHUNK_SIZE ):
+			_options = dict( options )
+			_options['filter[%s]' % field] = '[%s]' % '|'.join( [ str(id) for id in ids[i:i+self.IDS_CHUNK_SIZE] ] )
+			el = self.search( pattern, _options )
+			for node in el.iterfind( '*/%s' % item_tag ):
+				yield node
+
+	def iter_search_range( self, pattern, fromId, count, options, item_tag ):
+		""" Read the items from fromId counting down to fromId-count+1 with a
+			single request (filter[id]=[first,last], sorted id_DESC). Yields
+			the <item_tag> nodes, missing ids are skipped. """
+		if count < 1 or fromId < 1:
+			return
+		_options = dict( options )
+		_options['filter[id]'] = '[%i,%i]' % (max( 1, fromId-count+1 ), fromId)
+		_options['sort'] = '[id_DESC]'
+		_options['limit'] = count
+		el = self.search( pattern, _options )
+		for node in el.iterfind( '*/%s' % item_tag ):
+			yield node
+
 	def get_accessrights( self ):
 		""" Return the access rights on API as dictionnary
 
@@ -220,16 +695,29 @@ class PrestaHelper(object):
 		count  - (default=1) the number of messages to retreive fromId (counting down)
 
 		Returns:
-		A list of CustomerMessageData objects
+		A list of CustomerMessageData objects (counting down). Missing IDs are skipped.
 		"""
 		_result = []
-		for i in range( count ): #  range(1)=0 range(2)=0,1
-			el = self.__prestashop.get( 'customer_messages', fromId-i )
+		for node in self.iter_search_range( 'customer_messages', fromId, count, {'display':'full'}, 'customer_message' ):
 			customermessage = CustomerMessageData( self )
-			customermessage.load_from_xml( el )
+			customermessage.load_from_node( node )
 			_result.append( customermessage )
 		return _result
 
+	def get_customermessages( self, ids ):
+		""" Retreive many customer messages with a few requests (see iter_search_ids)
+
+		Returns:
+		A list of CustomerMessageData in the same order than ids. Unknown IDs are skipped.
+		"""
+		ids = [ int(id) for id in ids ]
+		_messages = {}
+		for node in self.iter_search_ids( 'customer_messages', ids, {'display':'full'}, 'customer_message' ):
+			customermessage = CustomerMessageData( self )
+			customermessage.load_from_node( node )
+			_messages[customermessage.id] = customermessage
+		return [ _messages[id] for id in ids if id in _messages ]
+
 	def get_customer( self, id ):
 		""" Retreive the customer from the id
 
@@ -246,6 +734,22 @@ class PrestaHelper(object):
 		customer.load_from_xml( el )
 		return customer
 
+	def get_customers( self, ids ):
+		""" Retreive many customers with a few requests (see iter_search_ids)
+
+		:param ids: list of customer id (int)
+
+		Returns:
+		A list of CustomerData in the same order than ids. Unknown IDs are skipped.
+		"""
+		ids = [ int(id) for id in ids ]
+		_customers = {}
+		for node in self.iter_search_ids( 'customers', ids, {'display':'[%s]' % ','.join( CustomerData.__slots__ )}, 'customer' ):
+			customer = CustomerData( self )
+			customer.load_from_node( node )
+			_customers[int(customer.id)] = customer
+		return [ _customers[id] for id in ids if id in _customers ]
+
 	def get_address( self, id ):
 		""" Retreive the Address from the id
 
@@ -338,10 +842,45 @@ class PrestaHelper(object):
 		customerthread.load_from_xml( el )
 		return customerthread
 
+	def get_lastcustomerthread_id( self ):
+		""" Retreive the last customer thread ID Stored into PrestaShop"""
+		el = self.__prestashop.search( 'customer_threads', options={'limit':1, 'sort' : 'id_DESC'} )
+		return int( el.find( 'customer_threads/customer_thread' ).get( 'id' ) )
+
+	def get_lastcustomerthreads( self, fromId, count=1 ):
+		""" Retreive the last customer threads with a single request
+
+		fromId - ID from the thread to start from (see get_lastcustomerthread_id)
+		count  - (default=1) the number of threads to retreive fromId (counting down)
+
+		Returns:
+		A list of CustomerThreadData objects (counting down). Missing IDs are skipped.
+		"""
+		_result = []
+		for node in self.iter_search_range( 'customer_threads', fromId, count, {'display':'full'}, 'customer_thread' ):
+			customerthread = CustomerThreadData( self )
+			customerthread.load_from_node( node )
+			_result.append( customerthread )
+		return _result
+
+	def get_customerthreads( self, ids ):
+		""" Retreive many customer threads with a few requests (see iter_search_ids)
+
+		Returns:
+		A list of CustomerThreadData in the same order than ids. Unknown IDs are skipped.
+		"""
+		ids = [ int(id) for id in ids ]
+		_threads = {}
+		for node in self.iter_search_ids( 'customer_threads', ids, {'display':'full'}, 'customer_thread' ):
+			customerthread = CustomerThreadData( self )
+			customerthread.load_from_node( node )
+			_threads[customerthread.id] = customerthread
+		return [ _threads[id] for id in ids if id in _threads ]
+
 	def get_countries( self ):
 		""" Retreive a list of Countries (CountryData) from prestashop """
 		logging.debug( 'read countries' )
-		el = self.__prestashop.search( 'countries', options = {'display':'[id,iso_code,active,name]'} )
+		el = self.search( 'countries', options = {'display':'[id,iso_code,active,name]'} )
 		_result = CountryList( self )
 		# save_to_file('countries', el )
 		_result.load_from_xml( el )
@@ -349,7 +888,7 @@ class PrestaHelper(object):
 
 	def get_taxes( self ):
 		logging.debug( 'read taxes' )
-		el = self.__prestashop.search( 'taxes', options = {'display':'[id,active,rate]'} )
+		el = self.search( 'taxes', options = {'display':'[id,active,rate]'} )
 		_result = TaxList( self )
 		# save_to_file('taxes', el )
 		_result.load_from_xml( el )
@@ -357,7 +896,7 @@ class PrestaHelper(object):
 
 	def get_tax_rules( self ):
 		logging.debug( 'read tax rules' )
-		el = self.__prestashop.search( 'tax_rules', options = {'display':'[id,id_country,id_tax,id_tax_rules_group]'} )
+		el = self.search( 'tax_rules', options = {'display':'[id,id_country,id_tax,id_tax_rules_group]'} )
 		_result = TaxRuleList( self )
 		# save_to_file('tax_rules', el )
 		_result.load_from_xml( el )
@@ -365,7 +904,7 @@ class PrestaHelper(object):
 
 	def get_tax_rule_groups( self ):
 		logging.debug( 'read tax rule groups' )
-		el = self.__prestashop.search( 'tax_rule_groups', options = {'display':'[id,active,name]'} )
+		el = self.search( 'tax_rule_groups', options = {'display':'[id,active,name]'} )
 
 		_result = TaxRuleGroupList( self )
 		# save_to_file('tax_rule_groups', el )
@@ -374,7 +913,7 @@ class PrestaHelper(object):
 
 	def get_movement_reasons( self ):
 		logging.debug( 'read movement_reasons')
-		el = self.__prestashop.search( 'stock_movement_reasons', options = {'display':'[id,sign,name]'} ) # date_add, date_upd
+		el = self.search( 'stock_movement_reasons', options = {'display':'[id,sign,name]'} ) # date_add, date_upd
 
 		_result = MovementReasonList( self )
 		# save_to_file('movement_reasons', el )
@@ -383,7 +922,7 @@ class PrestaHelper(object):
 
 	def get_configurations( self ):
 		logging.debug( 'read configurations')
-		el = self.__prestashop.search( 'configurations', options = {'display':'[id,name,value]'} ) # date_add, date_upd
+		el = self.search( 'configurations', options = {'display':'[id,name,value]'} ) # date_add, date_upd
 
 		_result = ConfigurationList( self )
 		# save_to_file('configurations', el )
@@ -412,62 +951,78 @@ class PrestaHelper(object):
 	def get_carriers( self ):
 		""" Retreive a list of Carriers (CarrierData) from prestashop """
 		logging.debug( 'read carriers' )
-		el = self.__prestashop.search( 'carriers', options = {'display':'[id,deleted,active,name]'} )
+		el = self.search( 'carriers', options = {'display':'[id,deleted,active,name]'} )
 
 		_result = CarrierList( self )
 		_result.load_from_xml( el )
 
 		return _result
 
-	def get_products( self ):
-		""" retreive a list of products from PrestaShop """
+	def get_products( self, id_products=None ):
+		""" retreive a list of products from PrestaShop.
+			id_products allows to read only some products (with their combinations) """
 		# combinations are used to create the various "declinaisons" of a single product
 		logging.debug( 'read combinations' )
 		# Does it have ManufacturerPartNumber ???
 		_version = self.prestashop_version[0]*100+self.prestashop_version[1] # ex: (1,6,3,23) --> 1.6.3.23 --> 106
 		has_mpn = _version > 106
-		el = self.__prestashop.search( 'combinations', options = {'display' : '[id,id_product,reference, ean13,wholesale_price,price,weight%s]' % (',mpn' if has_mpn else '') } ) # read mpn?
+		_options = {'display' : '[id,id_product,reference, ean13,wholesale_price,price,weight%s]' % (',mpn' if has_mpn else '') } # read mpn?
 		_combinations = CombinationList( self )
-		#save_to_file( 'get_products_combinations', el )
-		_combinations.load_from_xml( el )
+		if id_products == None:
+			_combinations.load_from_nodes( self.iter_search( 'combinations', _options, 'combination' ) )
+		else:
+			_combinations.load_from_nodes( self.iter_search_ids( 'combinations', id_products, _options, 'combination', field='id_product' ) )
 
 		logging.debug( 'read products' )
 		#print( ElementTree.tostring( el ) )
 
-		el = self.__prestashop.search( 'products', options = {'display': '[id,reference,active,name,price,wholesale_price,id_supplier,id_category_default,advanced_stock_management,available_for_order,ean13,upc,weight,id_tax_rules_group%s]'  % (',mpn' if has_mpn else '') } )
-		# save_to_file( 'get_products', el )
-		#print( ElementTree.tostring( el ) )
-
+		_options = {'display': '[id,reference,active,name,price,wholesale_price,id_supplier,id_category_default,advanced_stock_management,available_for_order,ean13,upc,weight,id_tax_rules_group%s]'  % (',mpn' if has_mpn else '') }
 		_result = BaseProductList( self, _combinations if len(_combinations)>0 else None )
-		_result.load_from_xml( el )
+		if id_products == None:
+			_result.load_from_nodes( self.iter_search( 'products', _options, 'product' ) )
+		else:
+			_result.load_from_nodes( self.iter_search_ids( 'products', id_products, _options, 'product' ) )
 
 		return _result
 
-	def get_product_locations( self ):
+	def get_last_product_date_upd( self ):
+		""" Return the greatest date_upd of the products (string as returned by
+			PrestaShop, eg: '2026-10-18 09:12:55') or None without product """
+		el = self.search( 'products', {'display':'[id,date_upd]', 'sort':'[date_upd_DESC]', 'limit':1} )
+		return el.findtext( '*/product/date_upd' )
+
+	def get_product_locations( self, id_products=None ):
+		""" retreive the warehouse locations of all the products (or only the
+			given base id_products) """
 		logging.debug( 'read product locations' )
-		el = self.__prestashop.search( 'warehouse_product_locations', options = {'display': '[id,id_product,id_product_attribute,id_warehouse,location]'} )
+		_options = {'display': '[id,id_product,id_product_attribute,id_warehouse,location]'}
 		_result = ProductLocationList( self )
-		_result.load_from_xml( el )
+		if id_products == None:
+			_result.load_from_xml( self.search( 'warehouse_product_locations', options = _options ) )
+		else:
+			_result.load_from_nodes( self.iter_search_ids( 'warehouse_product_locations', id_products, _options, 'warehouse_product_location', field='id_product' ) )
 		return _result
 
 	def get_suppliers( self ):
 		""" retreive the list of suppliers """
 		logging.debug('read suppliers')
-		el = self.__prestashop.search( 'suppliers', options = {'display': '[id,active,name]'} )
+		el = self.search( 'suppliers', options = {'display': '[id,active,name]'} )
 
 		_result = SupplierList( self )
 		_result.load_from_xml( el )
 
 		return _result
 
-	def get_product_suppliers( self ):
-		""" retreive the list of all the supplier for all the products """
+	def get_product_suppliers( self, id_products=None ):
+		""" retreive the list of all the supplier for all the products (or
+			only the given base id_products) """
 		logging.debug('read product suppliers')
-		el = self.__prestashop.search( 'product_suppliers', options = {'display': '[id,id_product,id_supplier,id_product_attribute,product_supplier_reference]'} )
-
+		_options = {'display': '[id,id_product,id_supplier,id_product_attribute,product_supplier_reference]'}
 		_result = ProductSupplierList( self )
-		_result.load_from_xml( el )
-		#save_to_file( "get_product_suppliers", el )
+		if id_products == None:
+			_result.load_from_nodes( self.iter_search( 'product_suppliers', _options, 'product_supplier' ) )
+		else:
+			_result.load_from_nodes( self.iter_search_ids( 'product_suppliers', id_products, _options, 'product_supplier', field='id_product' ) )
 
 		return _result
 
@@ -482,7 +1037,7 @@ class PrestaHelper(object):
 	def get_order_states( self ):
 		""" Retreive the list of Order States (OrderStateDate) from prestashop """
 		logging.debug( 'read order states' )
-		el = self.__prestashop.search( 'order_states', options = {'display':'[id,unremovable,send_email,invoice,shipped,paid,deleted,name]'} )
+		el = self.search( 'order_states', options = {'display':'[id,unremovable,send_email,invoice,shipped,paid,deleted,name]'} )
 
 		#print( ElementTree.tostring( el ) )
 		_result = OrderStateList( self )
@@ -526,27 +1081,16 @@ class PrestaHelper(object):
 		#   So filter must be applied by code!
 		#
 		# el = self.__prestashop.search( 'orders', options={'limit':limit, 'sort' : 'id_DESC', 'display':'[id,current_state]', 'filter[current_state]': '[%i]' % order_state_filter } )
-		el = self.__prestashop.search( 'orders', options={'limit':limit, 'sort' : 'id_DESC', 'display':'[id,current_state]' } )
+		return [ id_order for id_order, current_state in self.get_order_current_states( limit ) if (order_state_filter == None) or (current_state == order_state_filter) ]
 
-		items = etree_to_dict( el )
+	def get_order_current_states( self, limit = 25 ):
+		""" Retreive the current_state of the last orders with a single request.
 
-		# print( items )
-		# Si aucune entrée due au filtrage (oui cela arrive)
-		if isinstance( items['prestashop']['orders'], str ):
-		  return []
-
-		# Si une seule entrée --> transformer l'unique dictionnaire en liste
-		order_list = items['prestashop']['orders']['order']
-		if isinstance( order_list, dict ):
-			order_list = [ order_list ]
-
-		# print( order_list )
-		_result = []
-		for order in order_list:
-			if (order_state_filter == None) or (int(order['current_state']['#text']) == order_state_filter):
-				_result.append( int(order['id']) )
-
-		return _result
+		Returns:
+		A list of (id_order, current_state) starting from the highest ID
+		"""
+		el = self.__prestashop.search( 'orders', options={'limit':limit, 'sort' : 'id_DESC', 'display':'[id,current_state]' } )
+		return [ (int( node.findtext('id') ), int( node.findtext('current_state') )) for node in el.iterfind( 'orders/order' ) ]
 
 
 	def get_last_orders( self, fromId, count=1 ):
@@ -557,22 +1101,25 @@ class PrestaHelper(object):
 		count  - (default=1) the number of orders to retreive fromId (counting down)
 
 		Returns:
-		A list of OrderData objects or PrestaShopWebServiceError exception in case of empty content
+		A list of OrderData objects (counting down). Order IDs out of range are skipped.
 		"""
-		_result = []
-		try:
-			for i in range( count ): #  range(1)=0 range(2)=0,1
-				el = self.__prestashop.get( 'orders', fromId-i )
-				#print( ElementTree.tostring( el ) )
-				order = OrderData( self )
-				order.load_from_xml( el )
-				_result.append( order )
-		except PrestaShopWebServiceError as e:
-			if 'response is empty' in str(e): # Order ID is certainly out of range
-				pass # ignore error and return empty list
-			else:
-				raise
-		return _result
+		return self.get_orders( [ fromId-i for i in range( count ) if fromId-i > 0 ] )
+
+	def get_orders( self, ids ):
+		""" Retreive many orders with a few requests (display=full, see iter_search_ids)
+
+		:param ids: list of order id (int)
+
+		Returns:
+		A list of OrderData in the same order than ids. Unknown IDs are skipped.
+		"""
+		ids = [ int(id) for id in ids ]
+		_orders = {}
+		for node in self.iter_search_ids( 'orders', ids, {'display':'full'}, 'order' ):
+			order = OrderData( self )
+			order.load_from_node( node )
+			_orders[order.id] = order
+		return [ _orders[id] for id in ids if id in _orders ]
 
 	def get_order_data( self, id ):
 		""" retreive the xml data for an order.
@@ -638,17 +1185,21 @@ class PrestaHelper(object):
 			_result.append( int(stock['id_product']['#text']) )
 		return _result
 
-	def get_stockavailables( self ):
-		""" retreive the list of stock availables from PrestaShop """
-		el = self.__prestashop.search( 'stock_availables' , options={ 'display':'[id, id_product,quantity,depends_on_stock,out_of_stock,id_product_attribute]' } )
+	def get_stockavailables( self, id_products=None ):
+		""" retreive the list of stock availables from PrestaShop (all or only
+			the ones of the given base id_products) """
+		_options = { 'display':'[id, id_product,quantity,depends_on_stock,out_of_stock,id_product_attribute]' }
 		_result = StockAvailableList( self )
-		_result.load_from_xml( el )
+		if id_products == None:
+			_result.load_from_nodes( self.iter_search( 'stock_availables', _options, 'stock_available' ) )
+		else:
+			_result.load_from_nodes( self.iter_search_ids( 'stock_availables', id_products, _options, 'stock_available', field='id_product' ) )
 
 		return _result
 
 	def get_categories( self ):
 		""" Load the product categories """
-		el = self.__prestashop.search( 'categories', options={ 'display':'[id,name,active,level_depth,is_root_category]' } )
+		el = self.search( 'categories', options={ 'display':'[id,name,active,level_depth,is_root_category]' } )
 		_result = CategoryList( self )
 		_result.load_from_xml( el )
 
@@ -768,9 +1319,12 @@ class ProductSearchResult( object ):
 
 class CachedPrestaHelper( PrestaHelper ):
 	""" PrestaHelper class that permamently cache some useful information """
-	CACHE_FILE_VERSION = 11
+	CACHE_FILE_VERSION = 13
 	CACHE_FILE_NAME    = 'cachefile.pkl'
 	CACHE_FILE_DATETIME= None
+	warmup_workers = 6 # resources fetched at the same time by load_from_webshop()
+	customer_cache_size = 1000 # customers kept in memory, see get_customer()
+	customer_cache_ttl = 600 # seconds
 
 	__carrier_list = None
 	__country_list = None
@@ -786,15 +1340,27 @@ class CachedPrestaHelper( PrestaHelper ):
 	__product_supplier_list = None
 	__configuration_list = None
 	__movement_reason_list = None
-
-	def __init__( self, presta_api_url, presta_api_key, debug = __debug__, progressCallback = None  ):
+	__sync_date_upd = None # greatest products date_upd at the last load/sync, see sync_incremental()
+	__tax_rate_table = None # (id_tax_rules_group, country_iso) -> rate, see build_tax_rate_table()
+	__product_params = None # id_product -> params dic, see build_product_params()
+	__product_tariffs = None # id_product -> (country_iso, tariff)
+	__product_params_errors = None # list of (id_product, message)
+	__stock_refresher = None # background thread, see start_stock_refresher()
+	__stock_refresher_stop = None # threading.Event stopping the refresher
+	__stock_refresh_interval = None # seconds
+	__last_stock_refresh = None
+	__stock_refresh_error = None
+
+	def __init__( self, presta_api_url, presta_api_key, debug = __debug__, progressCallback = None, page_size = None, page_workers = 4, pool_size = 10, timeout = None, output_format = 'XML' ):
 		""" constructor with connection parameter to PrestaShop API.
 		And loads cache data"""
 		self.progressCallback = progressCallback
+		self.__customer_cache = LRUCache( self.customer_cache_size, self.customer_cache_ttl )
+		self.__stock_lock = threading.Lock() # held while the stock quantities are updated or saved
 
 		# Initializing
 		self.fireProgress( 1, 1, 'Connecting WebShop...' )
-		PrestaHelper.__init__( self, presta_api_url, presta_api_key, debug )
+		PrestaHelper.__init__( self, presta_api_url, presta_api_key, debug, page_size, page_workers, pool_size, timeout, output_format )
 
 		# Loading cache
 		if os.path.isfile( self.CACHE_FILE_NAME ):
@@ -812,33 +1378,49 @@ class CachedPrestaHelper( PrestaHelper ):
 		self.fireProgress( 1, __MAX_STEP, 'Caching configuration...' )
 		self.__configuration_list = self.get_configurations()
 		self.fireProgress( 1, __MAX_STEP, 'Prestashop version: %r' % (self.prestashop_version,) )
+		# read before the products, changes made during the load are synchronized later
+		self.__sync_date_upd = self.get_last_product_date_upd()
 		# self.fireProgress( 1, __MAX_STEP, 'Prestashop DB ver.: %s' % self.__configuration_list.prestashop_version_db )
-		self.fireProgress( 2, __MAX_STEP, 'Caching Carriers...' )
-		self.__carrier_list = self.get_carriers()
-		self.fireProgress( 3, __MAX_STEP, 'Caching Order states...' )
-		self.__order_state_list = self.get_order_states()
-		self.fireProgress( 4, __MAX_STEP, 'Caching Products...' )
-		self.__product_list = self.get_products()
-		self.fireProgress( 5, __MAX_STEP, 'Caching Product Locations...' )
-		self.__product_location_list = self.get_product_locations()
-		self.fireProgress( 6, __MAX_STEP, 'Caching Suppliers...' )
-		self.__supplier_list = self.get_suppliers()
-		self.fireProgress( 7, __MAX_STEP, 'Caching Categories...' )
-		self.__category_list = self.get_categories()
-		self.fireProgress( 8, __MAX_STEP, 'Caching Stock Availables...' )
-		self.__stock_available_list = self.get_stockavailables()
-		self.fireProgress( 9, __MAX_STEP, 'Caching Product Suppliers...' )
-		self.__product_supplier_list = self.get_product_suppliers()
-		self.fireProgress( 10, __MAX_STEP, 'Caching Countries...' )
-		self.__country_list = self.get_countries()
-		self.fireProgress( 11, __MAX_STEP, 'Caching Taxes...' )
-		self.__tax_list = self.get_taxes()
-		self.fireProgress( 12, __MAX_STEP, 'Caching Tax Rules...' )
-		self.__tax_rule_list = self.get_tax_rules()
-		self.fireProgress( 13, __MAX_STEP, 'Caching Tax Rule Groups...' )
-		self.__tax_rule_group_list = self.get_tax_rule_groups()
-		self.fireProgress( 14, __MAX_STEP, 'Caching Movement Reasons...' )
-		self.__movement_reason_list = self.get_movement_reasons()
+		# Independent fetches (products reads the combinations by itself)
+		steps = [ ('Carriers', self.get_carriers), ('Order states', self.get_order_states),
+			('Products', self.get_products), ('Product Locations', self.get_product_locations),
+			('Suppliers', self.get_suppliers), ('Categories', self.get_categories),
+			('Stock Availables', self.get_stockavailables), ('Product Suppliers', self.get_product_suppliers),
+			('Countries', self.get_countries), ('Taxes', self.get_taxes),
+			('Tax Rules', self.get_tax_rules), ('Tax Rule Groups', self.get_tax_rule_groups),
+			('Movement Reasons', self.get_movement_reasons) ]
+		results = {}
+		if (ThreadPoolExecutor == None) or (self.warmup_workers < 2) or not self.thread_safe:
+			for step, (name, getter) in enumerate( steps ):
+				self.fireProgress( step+2, __MAX_STEP, 'Caching %s...' % name )
+				results[name] = getter()
+		else:
+			self.fireProgress( 2, __MAX_STEP, 'Caching %i resources (%i workers)...' % (len(steps), self.warmup_workers) )
+			with ThreadPoolExecutor( max_workers=self.warmup_workers ) as pool:
+				futures = dict( (pool.submit( getter ), name) for name, getter in steps )
+				try:
+					for future in as_completed( futures ):
+						results[futures[future]] = future.result()
+						self.fireProgress( len(results)+1, __MAX_STEP, '%s cached' % futures[future] )
+				finally:
+					for future in futures: # after a failure
+						future.cancel()
+
+		self.__carrier_list = results['Carriers']
+		self.__order_state_list = results['Order states']
+		self.__product_list = results['Products']
+		self.__product_location_list = results['Product Locations']
+		self.__supplier_list = results['Suppliers']
+		self.__category_list = results['Categories']
+		self.__stock_available_list = results['Stock Availables']
+		self.__product_supplier_list = results['Product Suppliers']
+		self.__country_list = results['Countries']
+		self.__tax_list = results['Taxes']
+		self.__tax_rule_list = results['Tax Rules']
+		self.__tax_rule_group_list = results['Tax Rule Groups']
+		self.__movement_reason_list = results['Movement Reasons']
+		self.build_tax_rate_table()
+		self.build_product_params()
 		
 		# Languages are not pickled yet
 		# self.fireProgress( 8, __MAX_STEP, 'Caching languages...' )
@@ -864,6 +1446,7 @@ class CachedPrestaHelper( PrestaHelper ):
 				logging.warning( 'Reload cache from %s failed. File version %i, expected version %i.' % (self.CACHE_FILE_NAME, saved_version, self.CACHE_FILE_VERSION ) )
 				return False
 			self.CACHE_FILE_DATETIME = pickle.load( fh )
+			self.__sync_date_upd = pickle.load( fh )
 			logging.info( 'Cache date %s' % self.CACHE_FILE_DATETIME.strftime("%Y-%m-%d %H:%M:%S") )
 			self.__carrier_list = CarrierList( self )
 			self.__carrier_list.unpickle_data( fh )
@@ -885,11 +1468,16 @@ class CachedPrestaHelper( PrestaHelper ):
 			self.__tax_list.unpickle_data( fh )
 			self.__tax_rule_list = TaxRuleList( self )
 			self.__tax_rule_list.unpickle_data( fh )
-			self.__tax_rule_group_list = TaxRuleList( self )
+			self.__tax_rule_group_list = TaxRuleGroupList( self )
 			self.__tax_rule_group_list.unpickle_data( fh )
+			self.__configuration_list = ConfigurationList( self )
 			self.__configuration_list.unpickle_data( fh )
+			self.__movement_reason_list = MovementReasonList( self )
 			self.__movement_reason_list.unpickle_data( fh )
+			self.__product_location_list = ProductLocationList( self )
 			self.__product_location_list.unpickle_data( fh )
+			self.build_tax_rate_table()
+			self.build_product_params()
 
 			return True
 		except Exception as error:
@@ -907,12 +1495,14 @@ class CachedPrestaHelper( PrestaHelper ):
 			logging.info( 'Save cache to file %s' % self.CACHE_FILE_NAME )
 			pickle.dump( self.CACHE_FILE_VERSION, fh )
 			pickle.dump( now, fh )
+			pickle.dump( self.__sync_date_upd, fh )
 			self.__carrier_list.pickle_data( fh )
 			self.__order_state_list.pickle_data( fh )
 			self.__product_list.pickle_data( fh )
 			self.__supplier_list.pickle_data( fh )
 			self.__category_list.pickle_data( fh )
-			self.__stock_available_list.pickle_data( fh )
+			with self.__stock_lock:
+				self.__stock_available_list.pickle_data( fh )
 			self.__product_supplier_list.pickle_data( fh )
 			self.__country_list.pickle_data( fh )
 			self.__tax_list.pickle_data( fh )
@@ -924,9 +1514,268 @@ class CachedPrestaHelper( PrestaHelper ):
 		finally:
 			fh.close()
 
+	def build_tax_rate_table( self ):
+		""" Compute the VAT rates for every (id_tax_rules_group, country_iso) from
+			the cached tax rules. Must be called when the tax data is reloaded. """
+		self.__tax_rate_table = {}
+		_seen = set()
+		for rule in self.__tax_rule_list:
+			# only the first rule for a group + country applies (see taxrule_for_country)
+			if (rule.id_tax_rules_group, rule.id_country) in _seen:
+				continue
+			_seen.add( (rule.id_tax_rules_group, rule.id_country) )
+			country = self.__country_list.country_from_id( rule.id_country )
+			tax = self.__tax_list.tax_from_id( rule.id_tax )
+			if (country == None) or (tax == None):
+				continue # get_tax_rate() will report the error
+			self.__tax_rate_table.setdefault( (rule.id_tax_rules_group, country.iso_code), tax.rate )
+
+	def invalidate_tax_rate_table( self ):
+		""" Drop the VAT rate table. It will be computed again on the next get_tax_rate() """
+		self.__tax_rate_table = None
+
+	def get_tax_rate( self, id_tax_rule_group, country_iso ):
+		""" Products does not have Tax_id but Tax_Rule_Group + Country for which we do need it. """
+		if self.__tax_rate_table == None:
+			self.build_tax_rate_table()
+		rate = self.__tax_rate_table.get( (id_tax_rule_group, country_iso.upper()) )
+		if rate != None:
+			return rate
+		# Not in the table --> let the lookups raise the appropriate error
+		return PrestaHelper.get_tax_rate( self, id_tax_rule_group, country_iso )
+
+	@property
+	def id_supplier_params( self ):
+		""" ID of the special PARAMS supplier (None when missing) """
+		_item = self.__supplier_list.supplier_from_name( "PARAMS" )
+		return _item.id if _item != None else None
+
+	@property
+	def id_supplier_tariff( self ):
+		""" ID of the special TARIFF-CODE supplier (None when missing) """
+		_item = self.__supplier_list.supplier_from_name( "TARIFF-CODE" )
+		return _item.id if _item != None else None
+
+	def build_product_params( self ):
+		""" Decode once the references of the special PARAMS and TARIFF-CODE suppliers
+			for all the products. Must be called when the product suppliers are reloaded.
+			Encoding errors are logged here (and kept in product_params_errors). """
+		self.__product_params = {}
+		self.__product_tariffs = {}
+		self.__product_params_errors = []
+
+		_id_params = self.id_supplier_params
+		_id_tariff = self.id_supplier_tariff
+		if (_id_params == None) and (_id_tariff == None):
+			return
+
+		for item in self.__product_supplier_list:
+			# only the first reference for a product + supplier applies (see reference_for)
+			if (item.id_supplier == _id_params) and not( item.id_product in self.__product_params ):
+				_p, errors = parse_product_params( item.reference )
+				self.__product_params[item.id_product] = _p
+				for msg in errors:
+					self.__product_params_errors.append( (item.id_product, msg) )
+			elif (item.id_supplier == _id_tariff) and not( item.id_product in self.__product_tariffs ):
+				if len( item.reference )==0:
+					continue
+				lst = item.reference.split(',')
+				if len( lst )!= 2:
+					self.__product_params_errors.append( (item.id_product, 'Invalid product TARIFF "%s". it must have 2 parts (country,tariff)' % item.reference) )
+					continue
+				self.__product_tariffs[item.id_product] = (lst[0], lst[1])
+
+		for id_product, msg in self.__product_params_errors:
+			logging.warning( 'id_product %s: %s' % (id_product, msg) )
+
+	def invalidate_product_params( self ):
+		""" Drop the decoded PARAMS and TARIFF-CODE. They will be decoded again on next access """
+		self.__product_params = None
+		self.__product_tariffs = None
+		self.__product_params_errors = None
+
+	def product_params( self, id_product ):
+		""" Return the decoded PARAMS of the product (see parse_product_params).
+			The returned dictionnary is shared and must not be modified. """
+		if self.__product_params == None:
+			self.build_product_params()
+		return self.__product_params.get( id_product, {} )
+
+	def product_tariff( self, id_product ):
+		""" Return the tuple (country_iso, tariff) stored in the TARIFF-CODE
+			supplier reference of the product. None when not available. """
+		if self.__product_tariffs == None:
+			self.build_product_params()
+		return self.__product_tariffs.get( id_product )
+
+	@property
+	def product_params_errors( self ):
+		""" list of (id_product, message) for the badly encoded PARAMS / TARIFF-CODE """
+		if self.__product_params_errors == None:
+			self.build_product_params()
+		return self.__product_params_errors
+
+	def get_customer( self, id ):
+		""" Same as PrestaHelper.get_customer() through the customer cache """
+		customer = self.__customer_cache.get( id )
+		if customer == None:
+			customer = PrestaHelper.get_customer( self, id )
+			self.__customer_cache.put( id, customer )
+		return customer
+
+	def get_customers( self, ids ):
+		""" Same as PrestaHelper.get_customers() through the customer cache.
+			Only the customers missing from the cache are requested. """
+		ids = [ int(id) for id in ids ]
+		_customers = {}
+		for id in ids:
+			customer = self.__customer_cache.get( id )
+			if customer != None:
+				_customers[id] = customer
+		for customer in PrestaHelper.get_customers( self, [ id for id in ids if not id in _customers ] ):
+			_customers[int(customer.id)] = customer
+			self.__customer_cache.put( int(customer.id), customer )
+		return [ _customers[id] for id in ids if id in _customers ]
+
+	def invalidate_customers( self ):
+		""" Drop the cached customers (they will be read again from the WebShop) """
+		self.__customer_cache.clear()
+
+	def sync_incremental( self ):
+		""" Update the products, combinations and product suppliers changed on
+			the WebShop since the last load (or sync) instead of reloading them.
+
+			A product is read again (with its combinations, product suppliers,
+			stock availables and locations)
+			when its date_upd is after the high-water mark or when an ids-only
+			pass finds added, deleted or edited (reference, ean13, supplier
+			reference) combinations or product suppliers for it.
+			Products missing from the ids-only pass are removed.
+
+			Returns:
+				(updated, deleted) count of PrestaShop products
+		"""
+		if self.__sync_date_upd == None: # No mark (cache without products)
+			self.load_from_webshop()
+			return (len( self.__product_list ), 0)
+		_mark = self.get_last_product_date_upd() # read before the changes
+
+		# changed since the mark (">" on the previous second to include the mark itself)
+		_since = datetime.strptime( self.__sync_date_upd, '%Y-%m-%d %H:%M:%S' ) - timedelta( seconds=1 )
+		_options = {'display':'[id]', 'filter[date_upd]':'>[%s]' % _since.strftime( '%Y-%m-%d %H:%M:%S' ), 'date':'1'}
+		_changed = set( [ int( node.findtext( 'id' ) ) for node in self.iter_search( 'products', _options, 'product' ) ] )
+
+		# ids-only passes: new/deleted products, combinations and product suppliers
+		_ids = set( [ int( node.findtext( 'id' ) ) for node in self.iter_search( 'products', {'display':'[id]'}, 'product' ) ] )
+		_cached_ids = set( [ base_id_product( item.id ) for item in self.__product_list.indexed_items() ] )
+		_deleted = _cached_ids - _ids
+		_changed |= _ids - _cached_ids
+
+		# the edited rows differ on the compared fields (normalized like the loaders do)
+		_keys = set()
+		for node in self.iter_search( 'combinations', {'display':'[id,id_product,reference,ean13]'}, 'combination' ):
+			_data = CombinationData( self )
+			_data.load_from_xml( node )
+			_ean13 = calculate_ean13( _data.ean13 ) if len( _data.ean13 ) == 12 else _data.ean13
+			_keys.add( (_data.id, _data.id_product or 0, _data.reference, _ean13) )
+		_cached_keys = set( [ (item.id, item.id_product, item.reference, item.ean13) for item in self.__product_list.combinationlist or [] ] )
+		_changed |= set( [ key[1] for key in _keys ^ _cached_keys ] )
+
+		_keys = set()
+		for node in self.iter_search( 'product_suppliers', {'display':'[id,id_product,id_supplier,product_supplier_reference]'}, 'product_supplier' ):
+			_data = ProductSupplierData( self )
+			_data.load_from_xml( node )
+			_keys.add( (_data.id, _data.id_product or 0, _data.id_supplier, _data.reference) )
+		_cached_keys = set( [ (item.id, base_id_product( item.id_product ), item.id_supplier, item.reference) for item in self.__product_supplier_list ] )
+		_changed |= set( [ key[1] for key in _keys ^ _cached_keys ] )
+
+		_changed = _changed - _deleted - set( [0] )
+		logging.info( 'sync_incremental since %s: %i products changed, %i deleted' % (self.__sync_date_upd, len(_changed), len(_deleted)) )
+		if _changed or _deleted:
+			_id_products = sorted( _changed )
+			self.__product_list.upsert_products( self.get_products( _id_products ), _changed | _deleted )
+			self.__product_supplier_list.upsert_products( self.get_product_suppliers( _id_products ), _changed | _deleted )
+			self.__product_location_list.upsert_products( self.get_product_locations( _id_products ), _changed | _deleted )
+			_stocks = self.get_stockavailables( _id_products )
+			with self.__stock_lock:
+				self.__stock_available_list.upsert_products( _stocks, _changed | _deleted )
+			self.invalidate_product_params()
+		self.__sync_date_upd = _mark
+		return (len( _changed ), len( _deleted ))
+
 	def refresh_stock( self ):
-		""" Reload the stock availables """
-		self.__stock_available_list.update_quantities()
+		""" Reload the stock availables. The quantities are read first then
+			applied under the stock lock, also taken by the readers of search
+			results (see __update_search_product_qty): a displayed list never
+			mixes old and new quantities (see start_stock_refresher) """
+		_stock_list = self.__stock_available_list
+		_quantities = _stock_list.read_quantities()
+		with self.__stock_lock:
+			_stock_list.apply_quantities( _quantities )
+			self.__last_stock_refresh = datetime.now()
+
+	def refresh_stock_for( self, id_products, psr_list = None ):
+		""" Reload the stock quantities of the given products only. The qty of
+			the ProductSearchResult in psr_list are updated as well.
+
+			Returns the number of stock availables updated """
+		_stock_list = self.__stock_available_list
+		_quantities = _stock_list.read_quantities( id_products )
+		with self.__stock_lock:
+			_count = _stock_list.apply_quantities( _quantities )
+		if psr_list:
+			self.__update_search_product_qty( psr_list )
+		return _count
+
+	def start_stock_refresher( self, interval ):
+		""" Start a background thread calling refresh_stock() every interval
+			seconds. Restart it when already running. Not available when the
+			WebService cannot be shared between threads (see thread_safe). """
+		self.stop_stock_refresher()
+		if not self.thread_safe:
+			logging.warning( 'Background stock refresh disabled: requires prestapyt >= 0.8 (requests session)' )
+			return
+		self.__stock_refresher_stop = threading.Event()
+		self.__stock_refresh_interval = interval
+		self.__stock_refresher = threading.Thread( target=self.__stock_refresher_run, args=(interval, self.__stock_refresher_stop), name='stock-refresher' )
+		self.__stock_refresher.daemon = True # never prevents the application to exit
+		self.__stock_refresher.start()
+
+	def stop_stock_refresher( self ):
+		""" Ask the background stock refresher to stop (does not wait for
+			the end of a running refresh) """
+		if self.__stock_refresher == None:
+			return
+		self.__stock_refresher_stop.set()
+		self.__stock_refresher = None
+
+	def __stock_refresher_run( self, interval, stop ):
+		""" Body of the stock refresher thread, until stop is set """
+		while not stop.wait( interval ):
+			try:
+				self.refresh_stock()
+				self.__stock_refresh_error = None
+			except Exception as err:
+				logging.exception( 'Background stock refresh failed' )
+				self.__stock_refresh_error = err
+
+	@property
+	def stock_refresh_interval( self ):
+		""" Seconds between two background stock refreshes. None when the
+			refresher is not running """
+		if self.__stock_refresher == None:
+			return None
+		return self.__stock_refresh_interval
+
+	@property
+	def last_stock_refresh( self ):
+		""" datetime of the last stock refresh (None when not refreshed since the startup) """
+		return self.__last_stock_refresh
+
+	@property
+	def stock_refresh_error( self ):
+		""" Exception raised by the last background stock refresh (None when succeeded) """
+		return self.__stock_refresh_error
 
 	def fireProgress( self, currentStep, maxStep, message ):
 		if self.progressCallback == None:
@@ -948,23 +1797,34 @@ class CachedPrestaHelper( PrestaHelper ):
 		return ""
 
 	def __update_search_product_qty( self, _list ):
-		""" Browse the _list  and update the quantity for the article
+		""" Browse the _list  and update the quantity for the article.
+			The quantities are copied under the stock lock: the whole list sees
+			the same stock (never half refreshed, see refresh_stock)
 
 		   :param _list: list of ProductSearchResult to be updated """
-		for psr in _list:
-			_sa = self.stock_availables.stockavailable_from_id_product( psr.product_data.id )
-			if _sa:
-				psr.qty = _sa.quantity
-			else:
-				psr.qty = -999
+		with self.__stock_lock:
+			for psr in _list:
+				_sa = self.stock_availables.stockavailable_from_id_product( psr.product_data.id )
+				if _sa:
+					psr.qty = _sa.quantity
+				else:
+					psr.qty = -999
 
 	def psr_instance( self, product ):
 		""" HELPER: create a ProductSearchResult instance for a given product and initialize
 		    all dependencies as supplier references and current stock quantity """
-		_psr = ProductSearchResult( product )
-		_psr.add_product_suppliers( self.__product_supplier_list.suppliers_for_id_product( product.id ) )
-		self.__update_search_product_qty( [_psr] )
-		return _psr
+		return self.psr_instances( [product] )[0]
+
+	def psr_instances( self, products ):
+		""" Same as psr_instance() for a list of products, the quantities come
+			from the same stock snapshot """
+		_result = []
+		for product in products:
+			_psr = ProductSearchResult( product )
+			_psr.add_product_suppliers( self.__product_supplier_list.suppliers_for_id_product( product.id ) )
+			_result.append( _psr )
+		self.__update_search_product_qty( _result )
+		return _result
 
 	def search_products_from_partialref(  self, sPartialRef, include_inactives = False ):
 		""" Find an active product from a partial reference """
@@ -1090,21 +1950,87 @@ class CachedPrestaHelper( PrestaHelper ):
 		""" Return the Stock Movement Reasons """
 		return self.__movement_reason_list
 
+class DataField( object ):
+	""" Describe a field of a BaseData (see BaseData.FIELDS)
+
+	Fields:
+		name(str)      - the slot receiving the value
+		path(str)      - tag of the XML child node (default: name)
+		type(function) - convert the node text (int, float, ...). None keeps the text.
+		default        - value when the node is missing or empty
+		multilang(bool)- the text is stored in <language> sub-nodes (see extract_language_text)
+		xlink(bool)    - reference to another resource, only valid when the node has
+		                 a xlink:href attribute (otherwise the default value is used) """
+	__slots__ = [ "name", "path", "type", "default", "multilang", "xlink" ]
+
+	def __init__( self, name, path=None, type=None, default=None, multilang=False, xlink=False ):
+		self.name      = name
+		self.path      = path if path != None else name
+		self.type      = type
+		self.default   = default
+		self.multilang = multilang
+		self.xlink     = xlink
+
 class BaseData( object ):
-	""" Base class for data object... having a reference to the helper """
+	""" Base class for data object... having a reference to the helper
+
+	Subclasses may declare the FIELDS (list of DataField) loaded by
+	load_from_xml() from the XML node and saved by the pickeling. """
 	__slots__ = [ "helper" ]
 
+	FIELDS = ()
+
 	def __init__( self, owner ):
 		""" the owner is the PrestaHelper instance which create the
 		data object
 		"""
 		self.helper = owner
 
+	@classmethod
+	def fields_mapper( cls ):
+		""" Return the function( data_object, node ) initializing the FIELDS of a
+			data_object from the XML node. It is prepared once per class. """
+		if '_fields_mapper' in cls.__dict__:
+			return cls._fields_mapper
+
+		_defaults = [ (field.name, field.default) for field in cls.FIELDS ]
+		_by_path  = dict( [ (field.path, (field.name, field.type, field.multilang, field.xlink)) for field in cls.FIELDS ] )
+
+		def mapper( obj, node ):
+			for name, default in _defaults:
+				setattr( obj, name, default )
+			for child in node:
+				spec = _by_path.get( child.tag )
+				if spec == None:
+					continue
+				name, convert, multilang, xlink = spec
+				if xlink and not( XLINK_HREF in child.attrib ):
+					continue # not a valid reference
+				text = extract_language_text( child ) if multilang else child.text
+				if text:
+					text = text.strip()
+				if not text:
+					continue # keep the default value
+				setattr( obj, name, convert( text ) if convert != None else text )
+
+		cls._fields_mapper = staticmethod( mapper )
+		return mapper
+
 	def load_from_xml( self, node ):
 		""" Initialize the object from an XML node returned by the
-		prestaShop WebService
+		prestaShop WebService (eg: <carrier> node for CarrierData)
 		"""
-		pass
+		if self.FIELDS:
+			self.fields_mapper()( self, node )
+
+	def __getstate__( self ):
+		""" return the values of the FIELDS for pickeling """
+		return tuple( [ getattr( self, field.name ) for field in self.FIELDS ] )
+
+	def __setstate__( self, state ):
+		""" restore the values of the FIELDS from unpickeling """
+		for field, value in zip( self.FIELDS, state ):
+			setattr( self, field.name, value )
 
 	@property
 	def as_text( self ):
@@ -1116,9 +2042,20 @@ class BaseData( object ):
 
 
 class BaseDataList( list ):
-	""" Base class to register list of BaseData object """
+	""" Base class to register list of BaseData object
+
+	Subclasses may declare secondary indexes used by the *_from_* lookups:
+		INDEXES       - { index_name : function(item) -> key }, keeps the first item found for a key.
+		MULTI_INDEXES - { index_name : function(item) -> key }, keeps the list of items for a key.
+		INDEXED_LISTS - names of the other lists (eg: inactivelist, deletedlist) covered by the indexes.
+	The indexes are computed on the first lookup after rebuild_indexes(). """
 	__slots__ = [ "helper" ]
 
+	INDEXES = {}
+	MULTI_INDEXES = {}
+	INDEXED_LISTS = ()
+	_indexes = None # index_name -> dictionnary, None when not computed
+
 	def __init__( self, owner ):
 		""" the owner is the PrestaHelper instance which create the
 			data objects )
@@ -1128,6 +2065,41 @@ class BaseDataList( list ):
 	def add_data_object( self, aBaseData ):
 		""" Register a BaseData chilphotoen into the list """
 		self.append( aBaseData )
+		if self._indexes != None:
+			self.__index_item( aBaseData )
+
+	def indexed_items( self ):
+		""" Iterate over the items of the list then over the items of the INDEXED_LISTS """
+		for item in self:
+			yield item
+		for name in self.INDEXED_LISTS:
+			for item in getattr( self, name ):
+				yield item
+
+	def rebuild_indexes( self ):
+		""" Drop the declared indexes, they are computed again on the next lookup.
+			Must be called after (re)loading the data or modifying the lists directly. """
+		self._indexes = None
+
+	def __index_item( self, item, indexes = None ):
+		if indexes == None:
+			indexes = self._indexes
+		for name, key_of in self.INDEXES.items():
+			indexes[name].setdefault( key_of( item ), item )
+		for name, key_of in self.MULTI_INDEXES.items():
+			indexes[name].setdefault( key_of( item ), [] ).append( item )
+
+	def from_index( self, index_name, key, default=None ):
+		""" Return the item (or the list of items for a MULTI_INDEXES) registered
+			for the key in the index_name """
+		_indexes = self._indexes
+		if _indexes == None:
+			# built aside then published: an other thread never sees a partial index
+			_indexes = dict( [ (name, {}) for name in list(self.INDEXES)+list(self.MULTI_INDEXES) ] )
+			for item in self.indexed_items():
+				self.__index_item( item, _indexes )
+			self._indexes = _indexes
+		return _indexes[index_name].get( key, default )
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -1144,6 +2116,7 @@ class BaseDataList( list ):
 			fh - file handler to read the data
 		"""
 		# Load the list of data
+		BaseDataList.rebuild_indexes( self )
 		aList = pickle.load( fh )
 		for item in aList:
 			# reassign the helper
@@ -1166,6 +2139,8 @@ class LanguageData( BaseData ):
 
 class LanguageList( BaseDataList ):
 	""" List of Languages """
+	INDEXES = { 'id'       : lambda item: item.id,
+				'iso_code' : lambda item: item.iso_code }
 
 	def load_from_xml( self, node ):
 		""" Load the language list with data comming from prestashop search.
@@ -1182,6 +2157,7 @@ class LanguageList( BaseDataList ):
 			_data.active   = int( item['active'] )
 
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -1202,18 +2178,11 @@ class LanguageList( BaseDataList ):
 
 	def language_from_id( self, Id ):
 		""" Return the LanguageData object from Language ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def language_from_iso_code( self, iso_code ):
 		""" Return the LanguageData object from Language iso_code (en, fr, nl) """
-		iso_code = iso_code.lower()
-		for item in self:
-			if item.iso_code == iso_code:
-				return item
-		return None
+		return self.from_index( 'iso_code', iso_code.lower() )
 
 	def name_from_id( self, Id ):
 		""" Return the LanguageData.name from the Language ID """
@@ -1265,8 +2234,11 @@ class OrderData( BaseData ):
 	def load_from_xml( self, node ):
 		""" Initialise the data of an Order """
 		#print( ElementTree.tostring( node ) )
-		items = etree_to_dict( node )
-		order = items['prestashop']['order']
+		self.load_from_node( node.find( 'order' ) )
+
+	def load_from_node( self, node ):
+		""" Initialise the data from an <order> node (see PrestaHelper.get_orders) """
+		order = etree_to_dict( node )['order']
 
 		# print( order )
 		self.id            = int( order['id'] )
@@ -1304,19 +2276,23 @@ class CustomerMessageData( BaseData ):
 
 	def load_from_xml( self, node ):
 		""" Initialize object from customer_message node """
-		item = etree_to_dict( node )
-		self.id = int( item['prestashop']['customer_message']['id'] )
-		if isinstance( item['prestashop']['customer_message']['id_employee'] , dict ):
-			self.id_employee = int( item['prestashop']['customer_message']['id_employee']['#text'] )
+		self.load_from_node( node.find( 'customer_message' ) )
+
+	def load_from_node( self, node ):
+		""" Initialize object from a <customer_message> node (see PrestaHelper.get_customermessages) """
+		message = etree_to_dict( node )['customer_message']
+		self.id = int( message['id'] )
+		if isinstance( message['id_employee'] , dict ):
+			self.id_employee = int( message['id_employee']['#text'] )
 		else:
 			self.id_employee = PRESTA_UNDEFINE_INT
-		if isinstance( item['prestashop']['customer_message']['id_customer_thread'], dict ):
-			self.id_customer_thread = int( item['prestashop']['customer_message']['id_customer_thread']['#text'] )
+		if isinstance( message['id_customer_thread'], dict ):
+			self.id_customer_thread = int( message['id_customer_thread']['#text'] )
 		else:
 			self.id_customer_thread = PRESTA_UNDEFINE_INT
-		self.message = item['prestashop']['customer_message']['message']
-		self.date_add = item['prestashop']['customer_message']['date_add']
-		self.read = item['prestashop']['customer_message']['read']
+		self.message = message['message']
+		self.date_add = message['date_add']
+		self.read = message['read']
 
 	def get_customerthread( self ):
 		""" request the CustomerThreadData via the helper.
@@ -1331,28 +2307,32 @@ class CustomerThreadData( BaseData ):
 
 	def load_from_xml( self, node ):
 		""" Initialize object from customer_thread node """
+		self.load_from_node( node.find( 'customer_thread' ) )
+
+	def load_from_node( self, node ):
+		""" Initialize object from a <customer_thread> node (see PrestaHelper.get_customerthreads) """
 		self.customer_message_ids = []
-		item = etree_to_dict( node )
-		self.id = int( item['prestashop']['customer_thread']['id'] )
-		if isinstance( item['prestashop']['customer_thread']['id_customer'], dict ):
-			self.id_customer = int( item['prestashop']['customer_thread']['id_customer']['#text'] )
+		thread = etree_to_dict( node )['customer_thread']
+		self.id = int( thread['id'] )
+		if isinstance( thread['id_customer'], dict ):
+			self.id_customer = int( thread['id_customer']['#text'] )
 		else:
 			self.id_customer = PRESTA_UNDEFINE_INT
-		if isinstance( item['prestashop']['customer_thread']['id_order'], dict ):
-			self.id_order = int( item['prestashop']['customer_thread']['id_order']['#text'] )
+		if isinstance( thread['id_order'], dict ):
+			self.id_order = int( thread['id_order']['#text'] )
 		else:
 			self.id_order = PRESTA_UNDEFINE_INT
-		if isinstance( item['prestashop']['customer_thread']['id_contact'], dict ):
-			self.id_contact = int( item['prestashop']['customer_thread']['id_contact']['#text'] )
+		if isinstance( thread['id_contact'], dict ):
+			self.id_contact = int( thread['id_contact']['#text'] )
 		else:
 			self.id_contact = PRESTA_UNDEFINE_INT
-		self.email = item['prestashop']['customer_thread']['email']
-		self.status = item['prestashop']['customer_thread']['status']
-		self.date_add = item['prestashop']['customer_thread']['date_add']
-		self.date_upd = item['prestashop']['customer_thread']['date_upd']
+		self.email = thread['email']
+		self.status = thread['status']
+		self.date_add = thread['date_add']
+		self.date_upd = thread['date_upd']
 
 		# --- List the messages ID ---
-		customer_messages_list = item['prestashop']['customer_thread']['associations']['customer_messages']
+		customer_messages_list = thread['associations']['customer_messages']
 		# Si une seule entrée --> transformer l'unique dictionnaire en liste
 		customer_messages_list = customer_messages_list [ 'customer_message' ]
 		if isinstance( customer_messages_list, dict ):
@@ -1363,11 +2343,7 @@ class CustomerThreadData( BaseData ):
 	def get_customermessages( self ):
 		""" Retreive a list of CustomerMessageData corresponding to the
 			list of message IDs in the list """
-		_result = []
-		for messageid in self.customer_message_ids:
-			# only keeps the first item of the list returned by get_lastcustomermessages
-			_result.append( self.helper.get_lastcustomermessages( messageid )[0] )
-		return _result
+		return self.helper.get_customermessages( self.customer_message_ids )
 
 class CustomerData( BaseData ):
 	""" Contains the Customer dada """
@@ -1375,15 +2351,18 @@ class CustomerData( BaseData ):
 
 	def load_from_xml( self, node ):
 		# print( ElementTree.tostring( node ) )
-		items = etree_to_dict( node )
-		items = items['prestashop']['customer']
+		self.load_from_node( node.find( 'customer' ) )
+
+	def load_from_node( self, node ):
+		""" Initialise the data from a <customer> node (see PrestaHelper.get_customers) """
+		items = etree_to_dict( node )['customer']
 
 		self.id        = items['id']
 		self.lastname  = items['lastname']
 		self.firstname = items['firstname']
 		self.email     = items['email']
 		self.id_gender = items['id_gender']
-		self.id_lang   = items['id_lang']['#text']
+		self.id_lang   = items['id_lang']['#text'] if isinstance( items['id_lang'], dict ) else items['id_lang']
 		self.note    = items['note' ]
 
 	@property
@@ -1395,20 +2374,10 @@ class CarrierData( BaseData ):
 	""" Contains the Carriers data """
 	__slots__ = ["id", "deleted", "active", "name" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the CarrierList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'deleted':self.deleted, 'active':self.active, 'name':self.name }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.deleted = dic['deleted']
-		self.active  = dic['active' ]
-		self.name    = dic['name' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'deleted', type=int ),
+			   DataField( 'active', type=int ),
+			   DataField( 'name' ) )
 
 
 class CarrierList( BaseDataList ):
@@ -1418,6 +2387,9 @@ class CarrierList( BaseDataList ):
 	deletedlist = []
 	inactivelist = []
 
+	INDEXES = { 'id' : lambda item: item.id }
+	INDEXED_LISTS = ( 'inactivelist', 'deletedlist' )
+
 	def load_from_xml( self, node ):
 		""" Load the Carrier list with data comming from prestashop search.
 			Must contains nodes: id, deleted, active, name """
@@ -1426,14 +2398,9 @@ class CarrierList( BaseDataList ):
 		self.inactivelist = []
 
 		# reload the data
-		items = etree_to_dict( node )
-		items = items['prestashop']['carriers']['carrier']
-		for item in items:
+		for item in node.iterfind( '*/carrier' ):
 			_data = CarrierData( self.helper )
-			_data.deleted = int( item['deleted'] )
-			_data.active  = int( item['active'] )
-			_data.id      = int( item['id'] )
-			_data.name    = item['name']
+			_data.load_from_xml( item )
 			if _data.deleted == 1:
 				self.deletedlist.append( _data )
 			else:
@@ -1441,19 +2408,11 @@ class CarrierList( BaseDataList ):
 					self.inactivelist.append( _data )
 				else:
 					self.append( _data )
+		self.rebuild_indexes()
 
 	def carrier_from_id( self, Id ):
 		""" Return the CarrierData object from carrier ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.inactivelist:
-			if item.id == Id:
-				return item
-		for item in self.deletedlist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def name_from_id( self, Id ):
 		""" Return the CarrierData.name from the carrier ID """
@@ -1466,20 +2425,10 @@ class CountryData( BaseData ):
 	""" Contains the Country Data """
 	__slots__ = ["id", "iso_code", "active", "name" ] # id_zone not used
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the CountryList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'iso_code':self.iso_code, 'active':self.active, 'name':self.name }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.iso_code = dic['iso_code']
-		self.active  = dic['active' ]
-		self.name    = dic['name' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'iso_code', type=lambda s: s.upper() ),
+			   DataField( 'active', type=int ),
+			   DataField( 'name', default='', multilang=True ) )
 
 
 class CountryList( BaseDataList ):
@@ -1488,6 +2437,10 @@ class CountryList( BaseDataList ):
 	# used to store inactive and deleted carrier objects
 	inactivelist = []
 
+	INDEXES = { 'id'       : lambda item: item.id,
+				'iso_code' : lambda item: item.iso_code }
+	INDEXED_LISTS = ( 'inactivelist', )
+
 	def load_from_xml( self, node ):
 		""" Load the Country list with data comming from prestashop search.
 			Must contains nodes: id, iso_code, active, name """
@@ -1495,39 +2448,22 @@ class CountryList( BaseDataList ):
 		self.inactivelist = []
 
 		# reload the data
-		items = etree_to_dict( node )
-		items = items['prestashop']['countries']['country']
-		for item in items:
+		for item in node.iterfind( '*/country' ):
 			_data = CountryData( self.helper )
-			_data.active  = int( item['active'] )
-			_data.id      = int( item['id'] )
-			_data.name    = extract_hashtext( item['name'] ) # ['language']['#text']
-			_data.iso_code= item['iso_code'].upper()
+			_data.load_from_xml( item )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 	def country_from_id( self, Id ):
 		""" Return the CountryData object from record ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.inactivelist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def country_from_iso_code( self, iso_code ):
 		""" Return the CountryData object from record iso_code """
-		iso_code = iso_code.upper()
-		for item in self:
-			if item.iso_code == iso_code:
-				return item
-		for item in self.inactivelist:
-			if item.iso_code == iso_code:
-				return item
-		return None
+		return self.from_index( 'iso_code', iso_code.upper() )
 
 
 class AddressData( BaseData ):
@@ -1603,19 +2539,9 @@ class TaxData( BaseData ):
 	""" Contains the Tax Data """
 	__slots__ = ["id", "active", "rate" ] # id_zone not used
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the TaxList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'active':self.active, 'rate':self.rate }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.active  = dic['active' ]
-		self.rate    = dic['rate' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'active', type=int ),
+			   DataField( 'rate', type=float ) )
 
 class TaxList( BaseDataList ):
 	""" List of Taxes """
@@ -1623,6 +2549,9 @@ class TaxList( BaseDataList ):
 	# used to store inactive and deleted carrier objects
 	inactivelist = []
 
+	INDEXES = { 'id' : lambda item: item.id }
+	INDEXED_LISTS = ( 'inactivelist', )
+
 	def load_from_xml( self, node ):
 		""" Load the Tax list with data comming from prestashop search.
 			Must contains nodes: id, active, rate """
@@ -1630,144 +2559,92 @@ class TaxList( BaseDataList ):
 		self.inactivelist = []
 
 		# reload the data
-		items = etree_to_dict( node )
-		items = items['prestashop']['taxes']['tax']
-		for item in items:
+		for item in node.iterfind( '*/tax' ):
 			_data = TaxData( self.helper )
-			_data.active  = int( item['active'] )
-			_data.id      = int( item['id'] )
-			_data.rate    = float( item['rate'] ) # ['language']['#text']
+			_data.load_from_xml( item )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 	def tax_from_id( self, Id ):
 		""" Return the TaxData object from record ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.inactivelist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 class TaxRuleData( BaseData ):
 	""" Contains the Tax Data """
 	__slots__ = ["id", "id_tax", "id_country", "id_tax_rules_group" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the TaxList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'id_tax':self.id_tax, 'id_country':self.id_country, 'id_tax_rules_group':self.id_tax_rules_group }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.id_tax  = dic['id_tax' ]
-		self.id_country = dic['id_country' ]
-		self.id_tax_rules_group = dic['id_tax_rules_group' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'id_tax', type=int ),
+			   DataField( 'id_country', type=int ),
+			   DataField( 'id_tax_rules_group', type=int ) )
 
 class TaxRuleList( BaseDataList ):
 	""" List of Taxes """
+	INDEXES = { 'id'      : lambda item: item.id,
+				'country' : lambda item: (item.id_tax_rules_group, item.id_country) }
 
 	def load_from_xml( self, node ):
 		""" Load the Tax list with data comming from prestashop search.
 			Must contains nodes: id, id_tax, id_country, id_tax_rules_group """
 		# reload the data
-		items = etree_to_dict( node )
-		items = items['prestashop']['tax_rules']['tax_rule']
-		for item in items:
+		for item in node.iterfind( '*/tax_rule' ):
 			_data = TaxRuleData( self.helper )
-			_data.id      = int( item['id'] )
-			_data.id_tax  = int( item['id_tax'] )
-			_data.id_country = int( item['id_country']['#text'] )
-			_data.id_tax_rules_group = int( item['id_tax_rules_group']['#text'] )
+			_data.load_from_xml( item )
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def taxrule_from_id( self, Id ):
 		""" Return the TaxRuleData object from record ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def taxrule_for_country( self, id_tax_rules_group, id_country ):
-		for item in self:
-			if (item.id_tax_rules_group == id_tax_rules_group) and (item.id_country == id_country):
-				return item
-		return None
+		return self.from_index( 'country', (id_tax_rules_group, id_country) )
 
 class TaxRuleGroupData( BaseData ):
 	""" Contains the Tax Data """
 	__slots__ = ["id", "name", "active" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the TaxList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'name':self.name, 'active':self.active }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.name  = dic['name' ]
-		self.active = dic['active' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'name' ),
+			   DataField( 'active', type=int ) )
 
 class TaxRuleGroupList( BaseDataList ):
 	""" List of Taxes """
 	inactivelist = []
 
+	INDEXES = { 'id' : lambda item: item.id }
+
 	def load_from_xml( self, node ):
 		""" Load the Tax list with data comming from prestashop search.
 			Must contains nodes: id, active, name """
 		# clear the inner lists
 		self.inactivelist = []
 
-		items = etree_to_dict( node )
-		items = items['prestashop']['tax_rule_groups']['tax_rule_group']
-		for item in items:
+		for item in node.iterfind( '*/tax_rule_group' ):
 			_data = TaxRuleGroupData( self.helper )
-			_data.id      = int( item['id'] )
-			_data.active  = int( item['active'] )
-			_data.name    = item['name']
+			_data.load_from_xml( item )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 
 	def taxrulegroup_from_id( self, Id ):
 		""" Return the TaxRuleGroupData object from record ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 class MovementReasonData( BaseData ):
 	""" Raison for the stock movement """
 	__slots__ = ["id", "sign", "name" ]
 
 	# Sign is a multiplier: an integer +1 or -1
-
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the MovementReasonList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'name':self.name, 'sign':self.sign }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.sign = dic['sign' ]
-		self.name  = dic['name' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'sign', type=int ),
+			   DataField( 'name', default='', multilang=True ) )
 
 	def __repr__( self ):
 		return "<%s %s = %i>" % (self.__class__.__name__, self.name, self.sign )
@@ -1823,89 +2700,60 @@ class MovementList( BaseDataList ):
 
 class MovementReasonList( BaseDataList ):
 	""" List of Stock Movement Reason """
+	INDEXES = { 'id' : lambda item: item.id }
 
 	def load_from_xml( self, node ):
 		""" Load the Movement reason list with data comming from prestashop search.
 			Must contains nodes: id, name, value """
-		items = etree_to_dict( node )
-		items = items['prestashop']['stock_movement_reasons']['stock_movement_reason']
-		for item in items:
+		for item in node.iterfind( '*/stock_movement_reason' ):
 			_data = MovementReasonData( self.helper )
-			_data.id      = int( item['id'] )
-			_data.name    = extract_hashtext( item['name'] )
-			_data.sign    = int( item['sign'] )
+			_data.load_from_xml( item )
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def reason_from_id( self, id ):
 		""" Return the ConfigurationData object from Name """
-		for item in self:
-			if item.id == id:
-				return item
-		return None
+		return self.from_index( 'id', id )
 
 
 class ConfigurationData( BaseData ):
 	""" Contains the Configuration Information Data """
 	__slots__ = ["id", "name", "value" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the ConfigurationList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state of the object for pickeling """
-		return {'id':self.id, 'name':self.name, 'value':self.value }
-
-	def __setstate__(self, dic ):
-		""" set the current state of object from dic parameter """
-		self.id = dic['id']
-		self.name  = dic['name' ]
-		self.value = dic['value' ]
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'name' ),
+			   DataField( 'value' ) )
 
 	def __repr__( self ):
 		return "<%s %s = %r>" % (self.__class__.__name__, self.name, self.value )
 
 class ConfigurationList( BaseDataList ):
 	""" List of Configurations """
+	INDEXES = { 'name' : lambda item: item.name }
 
 	# used to store inactive supplier objects
 	def load_from_xml( self, node ):
 		""" Load the configuration list with data comming from prestashop search.
 			Must contains nodes: id, name, value """
-		items = etree_to_dict( node )
-		items = items['prestashop']['configurations']['configuration']
-		for item in items:
+		for item in node.iterfind( '*/configuration' ):
 			_data = ConfigurationData( self.helper )
-			_data.id      = int( item['id'] )
-			_data.name    = item['name']
-			_data.value   = item['value']
+			_data.load_from_xml( item )
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def value_of( self, name ):
 		""" Return the ConfigurationData object from Name """
-		for item in self:
-			if item.name == name:
-				return item.value
-		return None
+		item = self.from_index( 'name', name )
+		return item.value if item != None else None
 
 
 class SupplierData( BaseData ):
 	""" Contains the Supplier description data """
 	__slots__ = ["id", "active", "name" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the SupplierList """
-		pass
-
-	def __getstate__(self):
-		""" return state of the object for pickeling """
-		return { "id" : self.id, "active" : self.active, "name": self.name }
-
-	def __setstate__(self, dic):
-		""" set the state of the object based on dictionary """
-		self.id     = dic['id']
-		self.active = dic['active']
-		self.name   = dic['name']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'active', type=int ),
+			   DataField( 'name' ) )
 
 class SupplierList( BaseDataList ):
 	""" List of Suppliers """
@@ -1913,22 +2761,23 @@ class SupplierList( BaseDataList ):
 	# used to store inactive supplier objects
 	inactivelist = []
 
+	INDEXES = { 'id'   : lambda item: item.id,
+				'name' : lambda item: item.name.upper() }
+	INDEXED_LISTS = ( 'inactivelist', )
+
 	def load_from_xml( self, node ):
 		""" Load the supplier list with data comming from prestashop search.
 			Must contains nodes: id, active, name """
 		self.inactivelist = []
 
-		items = etree_to_dict( node )
-		items = items['prestashop']['suppliers']['supplier']
-		for item in items:
+		for item in node.iterfind( '*/supplier' ):
 			_data = SupplierData( self.helper )
-			_data.active  = int( item['active'] )
-			_data.id      = int( item['id'] )
-			_data.name    = item['name']
+			_data.load_from_xml( item )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -1954,16 +2803,11 @@ class SupplierList( BaseDataList ):
 			item.helper = self.helper
 			# register to the list
 			self.inactivelist.append( item )
+		self.rebuild_indexes()
 
 	def supplier_from_id( self, Id ):
 		""" Return the SupplierData object from Supplier ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.inactivelist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def name_from_id( self, Id ):
 		""" Return the SupplierData.name from the Supplier ID """
@@ -1974,51 +2818,49 @@ class SupplierList( BaseDataList ):
 
 	def supplier_from_name( self, name ):
 		""" Locate the supplier object for a given supplier name """
-		for item in self:
-			if item.name.upper() == name.upper():
-				return item
-
-		return None # Not find!
+		item = self.from_index( 'name', name.upper() )
+		if (item != None) and (item.active == 0):
+			return None # only search the active suppliers
+		return item
 
 class ProductSupplierData( BaseData ):
 	""" Contains the ProductSupplier description data """
 	__slots__ = ["id", "id_product", "id_supplier", "reference" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the SupplierList """
-		pass
-
-	def __getstate__(self):
-		""" return state of the object for pickeling """
-		return { "id" : self.id, "id_product" : self.id_product, "id_supplier": self.id_supplier, "reference" : self.reference }
-
-	def __setstate__(self, dic):
-		""" set the state of the object based on dictionary """
-		self.id          = dic['id']
-		self.id_product  = dic['id_product']
-		self.id_supplier = dic['id_supplier']
-		self.reference   = dic['reference']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'id_product', type=int ),
+			   DataField( 'id_supplier', type=int ),
+			   DataField( 'reference', path='product_supplier_reference', default='' ) )
 
 class ProductSupplierList( BaseDataList ):
+	INDEXES = { 'supplier' : lambda item: (item.id_product, item.id_supplier) }
+	MULTI_INDEXES = { 'id_product' : lambda item: item.id_product }
+
+	def __init__( self, owner ):
+		""" the owner is the PrestaHelper instance which create the
+			data objects )
+		"""
+		super(ProductSupplierList,self).__init__(owner)
+		self.__search_index = NGramIndex() # canonical reference -> ProductSupplierData
 
 	def load_from_xml( self, node ):
 		""" Load the product_supplier list with data comming from prestashop search.
 			Must contains nodes: id, id_product, id_supplier, product_supplier_reference """
-		items = etree_to_dict( node )
-		items = items['prestashop']['product_suppliers']['product_supplier']
-		for item in items:
+		self.load_from_nodes( node.iterfind( '*/product_supplier' ) )
+
+	def load_from_nodes( self, nodes ):
+		""" Load the product_supplier list from an iterable of <product_supplier>
+			nodes (see PrestaHelper.iter_search) """
+		for item in nodes:
 			_data = ProductSupplierData( self.helper )
-			_data.id      = int( item['id'] )
-			_data.id_product = int( item['id_product']['#text'] )
+			_data.load_from_xml( item )
 			# Is this a Combination product ?
-			if item['id_product_attribute'] != '0' :
-				_data.id_product = recompute_id_product( _data.id_product, int(item['id_product_attribute']['#text']))
+			id_product_attribute = item.findtext( 'id_product_attribute' ).strip()
+			if id_product_attribute != '0' :
+				_data.id_product = recompute_id_product( _data.id_product, int(id_product_attribute) )
 				#print( 'store productsupplier for id= %s' % _data.id_product )
-			_data.id_supplier = int( item['id_supplier']['#text'] )
-			_data.reference   = item['product_supplier_reference']
-			if _data.reference == None:
-				_data.reference = ''
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -2036,65 +2878,65 @@ class ProductSupplierList( BaseDataList ):
 		"""
 		BaseDataList.unpickle_data( self, fh )
 
-	def suppliers_for_id_product( self, id_product ):
-		""" find all the records for a given product """
-		result = []
+	def upsert_products( self, other, id_products ):
+		""" Replace the entries of the base id_products by the ones of the other
+			ProductSupplierList (see CachedPrestaHelper.sync_incremental) """
+		_ids = set( id_products )
+		self[:] = [ item for item in self if not( base_id_product( item.id_product ) in _ids ) ] + list( other )
+		for item in other:
+			item.helper = self.helper
+		self.sort( key=lambda item: item.id )
+		self.rebuild_indexes()
 
+	def add_data_object( self, aBaseData ):
+		""" Register a ProductSupplierData into the list and keep the search index up to date """
+		BaseDataList.add_data_object( self, aBaseData )
+		self.__index_reference( aBaseData )
+
+	def __index_reference( self, item ):
+		if item.reference:
+			self.__search_index.add( canonical_search_string( item.reference ), item )
+
+	def rebuild_indexes( self ):
+		""" Rebuild the lookup indexes. Must be called after direct modification of the list. """
+		BaseDataList.rebuild_indexes( self )
+		self.__search_index.clear()
 		for item in self:
-			if item.id_product == id_product:
-				result.append( item )
+			self.__index_reference( item )
 
-		return result
+	def suppliers_for_id_product( self, id_product ):
+		""" find all the records for a given product """
+		return list( self.from_index( 'id_product', id_product, [] ) )
 
 	def reference_for( self, id_product, id_supplier ):
 		""" Look for the reference on a specific supplier. if id_supplier
 		is None then return the first reference found """
-		result = self.suppliers_for_id_product( id_product )
-		if len( result )==0:
-			return ''
-
 		# No supplier mentionned --> return the first reference
 		if id_supplier == None:
-			return result[0].reference
+			result = self.from_index( 'id_product', id_product )
+			return result[0].reference if result else ''
 
-		for item in result:
-			if item.id_supplier == id_supplier:
-				return item.reference
-
-		return '' # No reference found for the specified ID_Supplier
+		# the first reference found for the supplier
+		item = self.from_index( 'supplier', (id_product, id_supplier) )
+		return item.reference if item != None else '' # No reference found for the specified ID_Supplier
 
 	def search_for_partialref( self, partialref ):
 		""" Search (not case sensitive) for entries having the partielref in their reference.
 
 		:param partialref: The partial reference to search for.
 		:returns: list of ProductSupplier. """
-		_result = []
-		partialref = canonical_search_string( partialref )
-		for item in self:
-			if item.reference and  (partialref in canonical_search_string( item.reference )):
-				_result.append( item )
-		return _result
+		return self.__search_index.search( canonical_search_string( partialref ) )
 
 
 class CategoryData( BaseData ):
 	""" Contains the Carriers data """
 	__slots__ = ["id", "active", "level_depth", "is_root_category" ,"name" ]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the CarrierList """
-		pass
-
-	def __getstate__(self):
-		""" Get tke object state for pickeling """
-		return {"id": self.id, "active":self.active, "level_depth":self.level_depth, "is_root_category":self.is_root_category ,"name":self.name }
-
-	def __setstate__(self, dic):
-		""" Set the state of the object from pickeling """
-		self.id          = dic['id']
-		self.active      = dic['active']
-		self.level_depth = dic['level_depth']
-		self.is_root_category = dic['is_root_category']
-		self.name        = dic['name']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'active', type=int ),
+			   DataField( 'level_depth', type=int ),
+			   DataField( 'is_root_category', type=int ),
+			   DataField( 'name', default='', multilang=True ) )
 
 class CategoryList( BaseDataList ):
 	""" List of Carriers """
@@ -2102,21 +2944,19 @@ class CategoryList( BaseDataList ):
 	# used to store inactive and deleted carrier objects
 	inactivelist = []
 
+	INDEXES = { 'id' : lambda item: item.id }
+	INDEXED_LISTS = ( 'inactivelist', )
+
 	def load_from_xml( self, node ):
 		""" Load the category list with data comming from prestashop search."""
-		items = etree_to_dict( node )
-		items = items['prestashop']['categories']['category']
-		for item in items:
+		for item in node.iterfind( '*/category' ):
 			_data = CategoryData( self.helper )
-			_data.active  = int( item['active'] )
-			_data.id      = int( item['id'] )
-			_data.name    = extract_hashtext( item['name'] ) # ['language']['#text']
-			_data.level_depth = int( item['level_depth'] )
-			_data.is_root_category = int( item['is_root_category'] )
+			_data.load_from_xml( item )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -2142,16 +2982,11 @@ class CategoryList( BaseDataList ):
 			item.helper = self.helper
 			# register to the list
 			self.inactivelist.append( item )
+		self.rebuild_indexes()
 
 	def category_from_id( self, Id ):
 		""" Return the CategoryData object from category ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.inactivelist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def name_from_id( self, Id ):
 		""" Return the CategoryData.name from the category ID """
@@ -2165,24 +3000,14 @@ class OrderStateData( BaseData ):
 	""" Contains the the Order State Data """
 	__slots__ = ["id","unremovable","send_email","invoice","shipped","paid","deleted","name"]
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the OrderStateList """
-		pass
-
-	def __getstate__(self):
-		""" return the current state for pickeling """
-		return { "id": self.id ,"unremovable": self.unremovable ,"send_email" : self.send_email,"invoice": self.invoice ,"shipped" : self.shipped ,"paid":self.paid ,"deleted" : self.deleted,"name": self.name }
-
-	def __setstate__(self, dic):
-		""" reinitialise the state of the object """
-		self.id         = dic['id']
-		self.unremovable= dic['unremovable']
-		self.send_email = dic['send_email']
-		self.invoice    = dic['invoice']
-		self.shipped    = dic['shipped']
-		self.paid       = dic['paid']
-		self.deleted    = dic['deleted']
-		self.name       = dic['name']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'unremovable', type=int ),
+			   DataField( 'send_email', type=int ),
+			   DataField( 'invoice', type=int ),
+			   DataField( 'shipped', type=int ),
+			   DataField( 'paid', type=int ),
+			   DataField( 'deleted', type=int ),
+			   DataField( 'name', default='', multilang=True ) )
 
 class OrderStateList( BaseDataList ):
 	""" List of Order State """
@@ -2190,6 +3015,9 @@ class OrderStateList( BaseDataList ):
 	# used to store deleted carrier objects
 	deletedlist = []
 
+	INDEXES = { 'id' : lambda item: item.id }
+	INDEXED_LISTS = ( 'deletedlist', )
+
 	# PREDEFINED status in PrestaShop
 	ORDER_STATE_WAIT_CHEQUE = 1
 	ORDER_STATE_PAID		= 2 # Order is paid
@@ -2209,24 +3037,14 @@ class OrderStateList( BaseDataList ):
 	def load_from_xml( self, node ):
 		""" Load the Order State list with data comming from prestashop search.
 			Must contains nodes: id, unremovable , send_email ,invoice , shipped , paid, deleted, name """
-		items = etree_to_dict( node )
-		items = items['prestashop']['order_states']['order_state']
-		#print( items )
-		for item in items:
+		for item in node.iterfind( '*/order_state' ):
 			_data = OrderStateData( self.helper )
-			_data.unremovable = int( item['unremovable'] )
-			_data.send_email  = int( item['send_email'] )
-			_data.invoice  	  = int( item['invoice'] )
-			_data.shipped  	  = int( item['shipped'] )
-			_data.paid        = int( item['paid'] )
-			_data.deleted     = int( item['deleted'] )
-			_data.id          = int( item['id'] )
-			#print( item )
-			_data.name        = extract_hashtext( item['name'] )
+			_data.load_from_xml( item )
 			if _data.deleted == 1:
 				self.deletedlist.append( _data )
 			else:
 				self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -2252,17 +3070,12 @@ class OrderStateList( BaseDataList ):
 			item.helper = self.helper
 			# register to the list
 			self.deletedlist.append( item )
+		self.rebuild_indexes()
 
 
 	def order_state_from_id( self, Id ):
 		""" Return the OrderStateData object from Order State ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		for item in self.deletedlist:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def name_from_id( self, Id ):
 		""" Return the OrderStateData.name from the OrderState ID """
@@ -2309,23 +3122,13 @@ class CombinationData( BaseData ):
 
 	__slots__ = ["id", "id_product", "reference", "ean13", "wholesale_price", "price", "mpn"]
 
-	def load_from_xml( self, node ):
-		""" Initialise the data from a combination """
-		pass
-
-	def __getstate__(self):
-		""" return the object state for pickeling """
-		return {"id":self.id, "id_product" : self.id_product, "reference" : self.reference, "ean13" : self.ean13, "wholesale_price": self.wholesale_price, "price": self.price, "mpn": self.mpn }
-
-	def __setstate__(self,dic):
-		""" Set the object state from unpickeling """
-		self.id             = dic['id']
-		self.id_product     = dic['id_product']
-		self.reference      = dic['reference']
-		self.ean13 			= dic['ean13']
-		self.wholesale_price= dic['wholesale_price']
-		self.price			= dic['price']
-		self.mpn			= dic['mpn']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'id_product', type=int, xlink=True ),
+			   DataField( 'reference', default='' ),
+			   DataField( 'ean13', default='' ),
+			   DataField( 'wholesale_price', type=float ),
+			   DataField( 'price', type=float, default=0 ),
+			   DataField( 'mpn', default='' ) ) # only read for PrestaShop > 1.6
 
 	def canonical_reference( self ):
 		""" Return the canonical search string of the reference.
@@ -2337,21 +3140,11 @@ class ProductLocationData( BaseData ):
 	""" Contains the WareHouse location for a giver Product or Product+Combination """
 	__slots__ = ["id", "id_product", "id_combination", "id_warehouse", "location" ]
 
-	def load_from_xml( self, node ):
-		""" Initialise the data from a combination """
-		pass
-
-	def __getstate__(self):
-		""" return the object state for pickeling """
-		return {"id":self.id, "id_product" : self.id_product, "id_combination" : self.id_combination, "id_warehouse" : self.id_warehouse, "location": self.location }
-
-	def __setstate__(self,dic):
-		""" Set the object state from unpickeling """
-		self.id             = dic['id']
-		self.id_product     = dic['id_product']
-		self.id_combination = dic['id_combination']
-		self.id_warehouse	= dic['id_warehouse']
-		self.location       = dic['location']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'id_product', type=int, xlink=True ),
+			   DataField( 'id_combination', path='id_product_attribute', type=int, xlink=True ),
+			   DataField( 'id_warehouse', type=int ),
+			   DataField( 'location' ) )
 
 
 class ProductData( BaseData ):
@@ -2378,7 +3171,26 @@ class ProductData( BaseData ):
 
 	Remarks: directly loaded from by the product list class """
 
-	__slots__ = ["id", "active", "reference", "name", "wholesale_price", "price", "id_supplier", "id_category_default", "advanced_stock_management", "available_for_order", "ean13", "upc", "weight", "id_tax_rules_group","__vat_rate","mpn" ]
+	__slots__ = ["id", "active", "reference", "name", "wholesale_price", "price", "id_supplier", "id_category_default", "advanced_stock_management", "available_for_order", "ean13", "upc", "weight", "id_tax_rules_group","__vat_rate","__price_ttc","mpn" ]
+
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'active', type=int ),
+			   DataField( 'reference' ),
+			   DataField( 'name', default='', multilang=True ),
+			   DataField( 'wholesale_price', type=float ),
+			   DataField( 'price', type=float, default=0 ),
+			   DataField( 'id_supplier', type=float, default=PRESTA_UNDEFINE_INT, xlink=True ),
+			   DataField( 'id_category_default', type=int ),
+			   DataField( 'advanced_stock_management', type=int ),
+			   DataField( 'available_for_order', type=int ),
+			   DataField( 'ean13', default='' ),
+			   DataField( 'upc', type=int ),
+			   DataField( 'weight', type=float ),
+			   # id_tax_rules_group may be defined as follow:
+			   #   When assigned: <id_tax_rules_group xlink:href="https://www.bonbonz.be/api/tax_rule_groups/55">55</id_tax_rules_group>
+			   #   When UNASSIGNED: <id_tax_rules_group>0</id_tax_rules_group>
+			   DataField( 'id_tax_rules_group', type=int, default=0, xlink=True ),
+			   DataField( 'mpn', default='' ) ) # only read for PrestaShop > 1.6
 
 	def __init__( self, owner ):
 		""" the owner is the PrestaHelper instance which create the
@@ -2386,43 +3198,15 @@ class ProductData( BaseData ):
 		"""
 		super(ProductData,self).__init__(owner)
 		self.__vat_rate = None # Can be set with update_vat_rate (6,21,20.5)
+		self.__price_ttc = None # Computed by update_vat_rate
 		self.upc = None
 		self.mpn = None
 
-	def load_from_xml( self, node ):
-		""" Initialise the data of an product """
-		pass
-
-	def __getstate__(self):
-		""" Return the object state for pickeling """
-		return { "id":self.id, "active":self.active, "reference":self.reference , "name":self.name, "wholesale_price": self.wholesale_price, "price": self.price, "id_supplier" : self.id_supplier, "id_category_default" : self.id_category_default , "advanced_stock_management" : self.advanced_stock_management, "available_for_order" : self.available_for_order, "ean13" : self.ean13, "weight" : self.weight, "id_tax_rules_group" : self.id_tax_rules_group, "upc": self.upc, "mpn": self.mpn }
-
-	def __setstate__(self, dic):
+	def __setstate__(self, state):
 		""" Set the object state from unpickeling """
-		self.id                       = dic['id']
-		self.active                   = dic['active']
-		self.reference                = dic['reference']
-		self.name                     = dic['name']
-		self.wholesale_price          = dic['wholesale_price']
-		self.price                    = dic['price']
-		self.id_supplier              = dic['id_supplier']
-		self.id_category_default      = dic['id_category_default']
-		self.advanced_stock_management= dic['advanced_stock_management']
-		self.available_for_order      = dic['available_for_order']
-		if 'ean13' in dic:
-			self.ean13				  = dic['ean13']
-		else:
-			self.ean13				  = ''
-		if ('upc' in dic) and (dic['upc']!=None):
-			self.upc 				  = int(dic['upc'])
-		else:
-			self.upc				  = None
-		if ('mpn' in dic) and (dic['mpn']!=None):
-			self.mpn                  = dic['mpn']
-		else:
-			self.mpn				  = ''
-		self.weight					  = dic['weight']
-		self.id_tax_rules_group		  = dic['id_tax_rules_group']
+		BaseData.__setstate__( self, state )
+		self.__vat_rate = None
+		self.__price_ttc = None
 
 	def canonical_reference( self ):
 		""" Return the canonical search string of the reference.
@@ -2430,8 +3214,14 @@ class ProductData( BaseData ):
 		return canonical_search_string( self.reference )
 
 	def update_vat_rate( self, vat_rate ):
-		""" Set the VAT rate from external source (6,21,20.5) """
+		""" Set the VAT rate from external source (6,21,20.5) and cache the price TTC """
 		self.__vat_rate = vat_rate
+		self.__price_ttc = self.price * (1+(vat_rate/100)) if vat_rate != None else None
+
+	@property
+	def vat_rate( self ):
+		""" VAT rate set with update_vat_rate() or None """
+		return self.__vat_rate
 
 	@property
 	def is_combination( self ):
@@ -2451,6 +3241,8 @@ class ProductData( BaseData ):
 	@property
 	def price_ttc(self):
 		""" Calculate the price TTC """
+		if self.__price_ttc != None:
+			return self.__price_ttc
 		rate = self.__vat_rate if self.__vat_rate else 21.0 # assume a default VAT rate
 		return self.price * (1+(rate/100)) # (1.06 if 'BK-' in self.reference else 1.21)
 
@@ -2473,23 +3265,12 @@ class StockAvailableData( BaseData ):
 	DEPENDS_ON_STOCK_SYNCH  = 1 # Quantity is synch with advanced stock management
 	DEPENDS_ON_STOCK_MANUAL = 0 # Manual management of quantities from product sheet.
 
-	def load_from_xml( self, node ):
-		""" properties initialized directly from the StockAvailableList """
-		pass
-
-	def __getstate__(self):
-		""" return state of the object for pickeling """
-		return { "id" : self.id, "id_product" : self.id_product, "depends_on_stock": self.depends_on_stock, "out_of_stock" : self.out_of_stock, "quantity" : self.quantity,
-		 		 "id_product_attribute" : self.id_product_attribute }
-
-	def __setstate__(self, dic):
-		""" set the state of the object based on dictionary """
-		self.id     		  = dic['id']
-		self.id_product 	  = dic['id_product']
-		self.depends_on_stock = dic['depends_on_stock']
-		self.out_of_stock 	  = dic['out_of_stock']
-		self.quantity 	  	  = dic['quantity']
-		self.id_product_attribute = dic['id_product_attribute']
+	FIELDS = ( DataField( 'id', type=int ),
+			   DataField( 'id_product', type=int, xlink=True ),
+			   DataField( 'depends_on_stock', type=int ),
+			   DataField( 'out_of_stock', type=int ),
+			   DataField( 'quantity', type=int ),
+			   DataField( 'id_product_attribute', type=int, xlink=True ) )
 
 	def update_quantity( self ):
 		""" Force the refresh of the quantity to have an UptToDate qty """
@@ -2507,29 +3288,25 @@ class StockAvailableList( BaseDataList ):
 	Remarks:
 	consider to use update_quantity() on childs to have a up-to-date
 	view of the quantities """
+	INDEXES = { 'id'         : lambda item: item.id,
+				'id_product' : lambda item: item.id_product }
 
 	def load_from_xml( self, node ):
 		""" Load the stock available list with data comming from prestashop search.
 			Must contains nodes: id, id_product, ... """
 		#save_to_file( 'StockAvailableList.load_from_xml', node)
-		items = etree_to_dict( node )
-		items = items['prestashop']['stock_availables']['stock_available']
-		for item in items:
-			# Sometime, the stock_available does not contains a valid ID_product
-			if not( '#text' in item['id_product'] ):
-				print( "stock_available: record id %s has invalid id_product %s" % (item['id'], item['id_product']) )
-				continue
+		self.load_from_nodes( node.iterfind( '*/stock_available' ) )
 
+	def load_from_nodes( self, nodes ):
+		""" Load the stock available list from an iterable of <stock_available>
+			nodes (see PrestaHelper.iter_search) """
+		for item in nodes:
 			_data = StockAvailableData( self.helper )
-			_data.id               = int( item['id'] )
-			_data.id_product       = int( item['id_product']['#text'] )
-			_data.depends_on_stock = int( item['depends_on_stock'] )
-			_data.out_of_stock     = int( item['out_of_stock' ] )
-			_data.quantity         = int( item['quantity'] )
-			if "#text" in item['id_product_attribute']:
-				_data.id_product_attribute = int( item['id_product_attribute']['#text'] )
-			else:
-				_data.id_product_attribute = None
+			_data.load_from_xml( item )
+			# Sometime, the stock_available does not contains a valid ID_product
+			if _data.id_product == None:
+				print( "stock_available: record id %s has invalid id_product" % _data.id )
+				continue
 			# Use the Internal ID_Product_combination when it applies
 			# 2 combinations for product 205!
 			# 		62000205 : HARIB-GUIM-COCO-200GR
@@ -2537,6 +3314,7 @@ class StockAvailableList( BaseDataList ):
 			if _data.id_product_attribute:
 				_data.id_product = recompute_id_product( _data.id_product, _data.id_product_attribute )
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -2554,27 +3332,57 @@ class StockAvailableList( BaseDataList ):
 		"""
 		BaseDataList.unpickle_data( self, fh )
 
+	def upsert_products( self, other, id_products ):
+		""" Replace the entries of the base id_products by the ones of the other
+			StockAvailableList (see CachedPrestaHelper.sync_incremental) """
+		_ids = set( id_products )
+		self[:] = [ item for item in self if not( base_id_product( item.id_product ) in _ids ) ] + list( other )
+		for item in other:
+			item.helper = self.helper
+		self.sort( key=lambda item: item.id )
+		self.rebuild_indexes()
+
 	def stockavailable_from_id( self, Id ):
 		""" Return the StockAvailableData object from StockAvailable ID """
-		for item in self:
-			if item.id == Id:
-				return item
-		return None
+		return self.from_index( 'id', Id )
 
 	def stockavailable_from_id_product( self, Id ):
 		""" Return the StockAvailableData from the product ID """
-		for item in self:
-			if item.id_product == Id:
-				return item
-		return None
+		return self.from_index( 'id_product', Id )
 
 	def update_quantities( self ):
 		""" query the quantities and update the inner list """
-		__el = self.helper.search( 'stock_availables', options={ 'display':'[id,quantity]' } )
-		__items = etree_to_dict( __el )
-		__items  = __items['prestashop']['stock_availables']['stock_available']
-		for __item in __items:
-			stock_id = int(__item['id'])
+		self.apply_quantities( self.read_quantities() )
+
+	def read_quantities( self, id_products = None ):
+		""" query the quantities without touching the inner list (see apply_quantities).
+
+		:param id_products: None for all the stock availables. Otherwise only the
+		                    stock rows of those products are read (filter[id]
+		                    requests, see PrestaHelper.iter_search_ids).
+
+		Returns a dictionnary stock_id -> quantity """
+		if id_products == None:
+			el = self.helper.search( 'stock_availables', options={ 'display':'[id,quantity]' } )
+			nodes = el.iterfind( 'stock_availables/stock_available' )
+		else:
+			stock_ids = []
+			for id_product in id_products:
+				stock_obj = self.stockavailable_from_id_product( id_product )
+				if stock_obj == None:
+					logging.warning( 'read_quantities() for cache: id_product %s has no stock_available in cache file.' % id_product )
+				else:
+					stock_ids.append( stock_obj.id )
+			nodes = self.helper.iter_search_ids( 'stock_availables', stock_ids, { 'display':'[id,quantity]' }, 'stock_available' )
+		return dict( [ (int( node.findtext( 'id' ) ), int( node.findtext( 'quantity' ) )) for node in nodes ] )
+
+	def apply_quantities( self, quantities ):
+		""" update the inner list with the quantities (stock_id -> quantity)
+			returned by read_quantities().
+
+			Returns the number of stock availables updated """
+		_count = 0
+		for stock_id, quantity in quantities.items():
 			stock_obj = self.stockavailable_from_id( stock_id )
 			if stock_obj == None:
 				# Quantity present for a product not available in the
@@ -2582,54 +3390,43 @@ class StockAvailableList( BaseDataList ):
 				logging.warning( 'update_quantities() for cache: stock_id %i not present in cache file. Database more recent than cache file.' % ( stock_id ) )
 				logging.warning( '  +--> Refresh cache data with CachedPrestaHelper.load_from_webshop() ')
 			else:
-				stock_obj.quantity = int( __item['quantity'] )
-		return
+				stock_obj.quantity = quantity
+				_count += 1
+		return _count
 
 class CombinationList( BaseDataList ):
 	""" List of product combination """
+	MULTI_INDEXES = { 'id_product' : lambda item: item.id_product }
 
 	def load_from_xml( self, node ):
 		#save_to_file('CombinationList.load_from_xml', node) # Debug
-		items = etree_to_dict( node )
-		#print( items )
-		items = items['prestashop']['combinations']['combination']
-		for item in items:
+		self.load_from_nodes( node.iterfind( '*/combination' ) )
+
+	def load_from_nodes( self, nodes ):
+		""" Load the combination list from an iterable of <combination> nodes
+			(see PrestaHelper.iter_search) """
+		for item in nodes:
+			_data = CombinationData( self.helper )
+			_data.load_from_xml( item )
 			# Sometime, the combination does not contains a valid ID_product
-			if not( '#text' in item['id_product'] ):
-				print( "Combination: record id %s has invalid id_product %s" % (item['id'], item['id_product']) )
+			if _data.id_product == None:
+				print( "Combination: record id %s has invalid id_product" % _data.id )
 				continue
-			# print( item )
-			_data = CombinationData( self.helper )
-			_data.id         = int( item['id'] )
-			_data.id_product = int( item['id_product']['#text'] )
-			_data.reference  = item['reference'] if item['reference']!= None else ''
-			_data.ean13      = item['ean13'] if item['ean13']!=None else ''
-			if self.helper.prestashop_version_nr > 106:
-				_data.mpn 	 = item['mpn'] if item['mpn']!=None else ''
-			else:
-				_data.mpn    = ''
-			_data.wholesale_price = float( item['wholesale_price'] )
-			if( item['price'] == None ):
-				_data.price = 0
-			else:
-				_data.price           = float( item['price'] )
 			# Auto-switch from EAN12 to EAN13
 			# Damned PrestaShop accept EAN12 instead of ean13!?!?
 			if len(_data.ean13) == 12:
 				_data.ean13 = calculate_ean13( _data.ean13 )
 			self.append( _data )
+		self.rebuild_indexes()
 
 	def has_combination( self, id_product ):
 		""" Check if it exists a combination for an id_product """
-		for item in self:
-			if item.id_product == id_product:
-				return True
-		return False
+		return self.from_index( 'id_product', id_product ) != None
 
 	def get_combinations( self, id_product ):
 		""" Return the combinations for an id_product or None """
-		_r = [item for item in self if item.id_product == id_product ]
-		return None if len(_r)==0 else _r
+		_r = self.from_index( 'id_product', id_product )
+		return None if _r == None else list( _r )
 
 	def recompute_id_product( self, id_product, id_combination ):
 		return recompute_id_product( id_product, id_combination )
@@ -2640,36 +3437,44 @@ class CombinationList( BaseDataList ):
 
 class ProductLocationList( BaseDataList ):
 	""" List of ProductLocation (api/warehouse_product_locations) """
+	MULTI_INDEXES = { 'id_product' : lambda item: item.id_product }
 
 	def load_from_xml( self, node ):
 		#save_to_file('ProductLocation.load_from_xml', node) # Debug
-		items = etree_to_dict( node )
-		#print( items )
-		items = items['prestashop']['warehouse_product_locations']['warehouse_product_location']
-		for item in items:
+		self.load_from_nodes( node.iterfind( '*/warehouse_product_location' ) )
+
+	def load_from_nodes( self, nodes ):
+		""" Load the list from an iterable of <warehouse_product_location> nodes
+			(see PrestaHelper.get_product_locations) """
+		for item in nodes:
+			_data = ProductLocationData( self.helper )
+			_data.load_from_xml( item )
 			# Sometime, the combination does not contains a valid ID_product
-			if not( '#text' in item['id_product'] ):
-				print( "ProductLocation: record id %s has invalid id_product %s" % (item['id'], item['id_product']) )
+			if _data.id_product == None:
+				print( "ProductLocation: record id %s has invalid id_product" % _data.id )
 				continue
-			# print( item )
-			_data = ProductLocationData( self.helper )
-			_data.id         = int( item['id'] )
-			_data.id_product = int( item['id_product']['#text'] )
-			_data.id_combination  = int( item['id_product_attribute']['#text'] ) if '#text' in item['id_product_attribute'] else None
-			_data.id_warehouse    = int( item['id_warehouse']['#text'] )
-			_data.location        = item['location']
 			# Only keep track of records with Location
 			if _data.location != None:
 				self.append( _data )
+		self.rebuild_indexes()
+
+	def upsert_products( self, other, id_products ):
+		""" Replace the entries of the base id_products by the ones of the other
+			ProductLocationList (see CachedPrestaHelper.sync_incremental) """
+		_ids = set( id_products )
+		self[:] = [ item for item in self if not( base_id_product( item.id_product ) in _ids ) ] + list( other )
+		for item in other:
+			item.helper = self.helper
+		self.sort( key=lambda item: item.id )
+		self.rebuild_indexes()
 
 	def locations_from_id_product( self, id_product, id_combination=None ):
 		_list = []
-		for item in self:
-			if item.id_product==id_product:
-				if id_combination==None:
-					_list.append( item )
-				elif item.id_combination==id_combination:
-					_list.append( item )
+		for item in self.from_index( 'id_product', id_product, [] ):
+			if id_combination==None:
+				_list.append( item )
+			elif item.id_combination==id_combination:
+				_list.append( item )
 		if len( _list )==0:
 			return None
 		return _list
@@ -2689,6 +3494,10 @@ def is_combination( id_product ):
 	""" Check if the ID_product is a recompute_id_product """
 	return (id_product >= 100000)
 
+def base_id_product( id_product ):
+	""" The PrestaShop id_product of a (recomputed) ID_product """
+	return unmangle_id_product( id_product )[0] if is_combination( id_product ) else id_product
+
 class BaseProductList( BaseDataList ):
 	""" List of product. Base class that can be derivated """
 
@@ -2696,6 +3505,10 @@ class BaseProductList( BaseDataList ):
 	inactivelist = []
 	combinationlist = None
 
+	# active products take precedence over inactive ones (as a list scan would do)
+	INDEXES = { 'id' : lambda item: item.id }
+	INDEXED_LISTS = ( 'inactivelist', )
+
 	def __init__( self, owner, combinationlist=None ):
 		""" the owner is the PrestaHelper instance which create the
 			data objects, the combinationlist may provided from previous load )
@@ -2703,66 +3516,47 @@ class BaseProductList( BaseDataList ):
 		super(BaseProductList,self).__init__(owner)
 		self.combinationlist = combinationlist
 		self.has_mpn = owner.prestashop_version_nr > 106
+		self.__ean_index = {} # ean13 or mpn -> [ProductData, ...] (active products only)
+		self.__ref_index = NGramIndex() # canonical reference of active products
+		self.__inactive_ref_index = NGramIndex() # canonical reference of inactive products
+		self.__label_index = WordIndex() # name of active products
+		self.__combination_index = {} # base id_product -> [combination id_product, ...] (active products only)
+		self.__inactive_label_index = WordIndex() # name of inactive products
 
 	def load_from_xml( self, node ):
 		""" Load the Product list with data comming from prestashop search.
 			Must contains nodes: id, name, active, ... """
+		#save_to_file( "BaseProductList.load_from_xml", node )
+		self.load_from_nodes( node.iterfind( '*/product' ) )
+
+	def load_from_nodes( self, nodes ):
+		""" Load the Product list from an iterable of <product> nodes
+			(see PrestaHelper.iter_search) """
 
-		def create_from_item( item ):
-			""" Init a ProductData from item dictionnary """
+		def create_from_node( node ):
+			""" Init a ProductData from the <product> node """
 			_data = ProductData( self.helper )
-			_data.active   = int( item['active'] )
-			_data.id       = int( item['id'] )
-			_data.id_category_default = int( item['id_category_default']['#text'] )
-			_data.available_for_order = int( item['available_for_order'] )
-			_data.advanced_stock_management = int( item['advanced_stock_management'] )
-			_data.name     = extract_hashtext( item['name'] ) # ['language']['#text']
-			_data.reference= item['reference']
-			# print( "reference", type(item['reference']) )
+			_data.load_from_xml( node )
 			if _data.reference==None:
 				print( "BaseProductList: Product ID %i has no reference!" % _data.id )
-			_data.wholesale_price = float( item['wholesale_price'] )
-			if isinstance( item['id_supplier'], str ): # Not a valid reference
-				_data.id_supplier = PRESTA_UNDEFINE_INT
-			else:
-				_data.id_supplier     = float( item['id_supplier']['#text'] )
-			if( item['price'] == None ):
-				_data.price = 0
-			else:
-				_data.price           = float( item['price'] )
 			if _data.active == 0:
 				self.inactivelist.append( _data )
 			else:
 				self.append( _data )
-			_data.ean13 = item['ean13'] if item['ean13']!=None else ''
-			if self.has_mpn:
-				_data.mpn = item['mpn'] if item['mpn']!=None else ''
-			else:
+			if not self.has_mpn:
 				_data.mpn = ''
-			_data.upc   = int(item['upc'])   if item['upc']!=None else None
-			_data.weight = float(item['weight'])
-			# id_tax_rules_group may be defined as follow:
-			#   When assigned: <id_tax_rules_group xlink:href="https://www.bonbonz.be/api/tax_rule_groups/55">55</id_tax_rules_group>
-			#   When UNASSIGNED: <id_tax_rules_group>0</id_tax_rules_group>
-			if( type(item['id_tax_rules_group']) is dict ): # Some record may not have tax rules
-				_data.id_tax_rules_group = int(item['id_tax_rules_group']['#text'])
-			else:
-				_data.id_tax_rules_group = 0 # id_tax_rules_group not assigned. Set it to 0 like PrestaShop does
-				if _data.active == 1: # If product is active, this may be a problem
-					print( 'Load product %i: %s. Invalid/Unassigned id_tax_rules_group!' % (_data.id,_data.reference) )
+			# id_tax_rules_group not assigned is set to 0 like PrestaShop does
+			if (_data.id_tax_rules_group == 0) and (_data.active == 1): # If product is active, this may be a problem
+				print( 'Load product %i: %s. Invalid/Unassigned id_tax_rules_group!' % (_data.id,_data.reference) )
 			return _data
 
 		# empty the list previously loaded
 		self.inactivelist = []
-		#save_to_file( "BaseProductList.load_from_xml", node )
-		items = etree_to_dict( node )
-		#print( items )
-		items = items['prestashop']['products']['product']
-		for item in items:
+		for item in nodes:
 			# print( item )
-			id_product = int(item['id'])
+			id_product = int( item.findtext( 'id' ) )
 			if not self.has_combination( id_product ):
-				_data = create_from_item( item ) # create the object from dict of data.
+				_data = create_from_node( item ) # create the object from the node.
 
 				# Auto-switch from EAN12 to EAN13
 				# Damned PrestaShop accept EAN12 instead of ean13!?!?
@@ -2772,7 +3566,7 @@ class BaseProductList( BaseDataList ):
 				# Product HAS COMBINATION --> so create a product entry for each item
 				_combinations = self.get_combinations( id_product )
 				for _combination in _combinations:
-					_data = create_from_item( item )
+					_data = create_from_node( item )
 					_data.reference = _combination.reference
 					_data.ean13     = _combination.ean13
 					_data.mpn 		= _combination.mpn
@@ -2781,6 +3575,31 @@ class BaseProductList( BaseDataList ):
 					# recompute an unique id_product (1 for 99.999 products)
 					_data.id        = self.combinationlist.recompute_id_product( _combination.id_product, _combination.id )
 
+		# the id of combination products is only known after their creation
+		self.rebuild_indexes()
+
+	def upsert_products( self, other, id_products ):
+		""" Replace the products of the base id_products (active, inactive and
+			their combinations) by the ones of the other BaseProductList (see
+			CachedPrestaHelper.sync_incremental). Products missing from other are
+			removed. The lists are kept in id order like a full load. """
+		_ids = set( id_products )
+		_keep = lambda item: not( base_id_product( item.id ) in _ids )
+		self[:] = [ item for item in self if _keep( item ) ] + [ item for item in other ]
+		self.inactivelist = [ item for item in self.inactivelist if _keep( item ) ] + list( other.inactivelist )
+		for item in list( other ) + list( other.inactivelist ):
+			item.helper = self.helper
+		self.sort( key=lambda item: base_id_product( item.id ) ) # stable: combinations stay in combination order
+		self.inactivelist.sort( key=lambda item: base_id_product( item.id ) )
+
+		if self.combinationlist == None:
+			self.combinationlist = CombinationList( self.helper )
+		self.combinationlist[:] = [ item for item in self.combinationlist if not( item.id_product in _ids ) ] + list( other.combinationlist or [] )
+		for item in other.combinationlist or []:
+			item.helper = self.helper
+		self.combinationlist.sort( key=lambda item: item.id )
+		self.combinationlist.rebuild_indexes()
+		self.rebuild_indexes()
 
 	def pickle_data( self, fh ):
 		""" organize the pickeling of data
@@ -2801,7 +3620,12 @@ class BaseProductList( BaseDataList ):
 		Parameter:
 			fh - file handler to read the data
 		"""
-		BaseDataList.unpickle_data( self, fh )
+		# Plain append: the indexes are built once by rebuild_indexes() at the end
+		BaseDataList.rebuild_indexes( self )
+		for item in pickle.load( fh ):
+			# reassign the helper
+			item.helper = self.helper
+			self.append( item )
 
 		# Load the deletedlist of data
 		aList = pickle.load( fh )
@@ -2814,13 +3638,67 @@ class BaseProductList( BaseDataList ):
 		# Load the combination list
 		aBoolean = pickle.load( fh )
 		if aBoolean:
-			self.combinationlist = pickle.load( fh )
-			for item in self.combinationlist:
+			# combinations are pickled as a simple list
+			self.combinationlist = CombinationList( self.helper )
+			for item in pickle.load( fh ):
 				# reassign the helper
 				item.helper = self.helper
+				self.combinationlist.add_data_object( item )
 		else:
 			aBoolean.combinationlist = None
 
+		self.rebuild_indexes()
+
+	def add_data_object( self, aBaseData ):
+		""" Register a ProductData into the list and keep the index up to date """
+		BaseDataList.add_data_object( self, aBaseData )
+		self.__index_ean( aBaseData )
+		self.__ref_index.add( aBaseData.canonical_reference(), aBaseData )
+		self.__label_index.add( aBaseData.name, aBaseData )
+		self.__index_combination( aBaseData )
+
+	def __index_combination( self, item ):
+		""" Register a combination product under its base id_product """
+		if is_combination( item.id ):
+			_id_product, _id_combination = unmangle_id_product( item.id )
+			self.__combination_index.setdefault( _id_product, [] ).append( item.id )
+
+	def __index_ean( self, item ):
+		""" Register the ean13 and mpn of an active product into the ean index """
+		for key in ( item.ean13, item.mpn ):
+			if not key:
+				continue
+			_lst = self.__ean_index.setdefault( key, [] )
+			if not( item in _lst ): # ean13 == mpn
+				_lst.append( item )
+
+	def rebuild_indexes( self ):
+		""" Rebuild the lookup indexes from the active and inactive products.
+			Must be called after direct modification of the lists (or product ids). """
+		BaseDataList.rebuild_indexes( self )
+
+		self.__ean_index = {}
+		for item in self:
+			self.__index_ean( item )
+
+		self.__ref_index.clear()
+		for item in self:
+			self.__ref_index.add( item.canonical_reference(), item )
+		self.__inactive_ref_index.clear()
+		for item in self.inactivelist:
+			self.__inactive_ref_index.add( item.canonical_reference(), item )
+
+		self.__label_index.clear()
+		for item in self:
+			self.__label_index.add( item.name, item )
+		self.__inactive_label_index.clear()
+		for item in self.inactivelist:
+			self.__inactive_label_index.add( item.name, item )
+
+		self.__combination_index = {}
+		for item in self:
+			self.__index_combination( item )
+
 	def has_combination( self, id_product ):
 		return self.combinationlist and self.combinationlist.has_combination( id_product )
 
@@ -2844,24 +3722,14 @@ class BaseProductList( BaseDataList ):
 
 	def product_from_id( self, id_product, include_inactives = True ):
 		""" Return the ProductData object from product ID """
-		for item in self:
-			if item.id == id_product:
-				return item
-		if include_inactives:
-			for item in self.inactivelist:
-				if item.id == id_product:
-					return item
-		return None
+		item = self.from_index( 'id', id_product )
+		if (item != None) and not(include_inactives) and (item.active == 0):
+			return None
+		return item
 
 	def product_combinations( self, id_product ):
 		""" Retreive the combination IDs for a given id_product """
-		lst = []
-		for item in self:
-			if is_combination( item.id ):
-				_id_product,_id_combination = unmangle_id_product( item.id )
-				if _id_product == id_product:
-					lst.append( item.id ) # this is a combination id
-		return lst
+		return list( self.__combination_index.get( id_product, [] ) )
 
 	def productinfo_from_id( self, id_product ):
 		""" Return a tuple with the  ProductData.reference and
@@ -2891,42 +3759,35 @@ class BaseProductList( BaseDataList ):
 		_result = []
 		_sToFind = canonical_search_string( sPartialRef )
 		if include_inactives:
-			for item in self.inactivelist:
-				sProductRef = item.canonical_reference()
-				if sProductRef.find( _sToFind )>=0 :
-					_result.append( item )
-					#print( "match")
-		for item in self:
-			sProductRef = item.canonical_reference()
-			if sProductRef.find( _sToFind )>=0 :
-				_result.append( item )
+			_result += self.__inactive_ref_index.search( _sToFind )
+		_result += self.__ref_index.search( _sToFind )
 		return _result
 
 	def search_products_from_label( self, sPartial, include_inactives = False ):
-		""" Find products based on the label """
-		sPartial = sPartial.upper()
+		""" Find products based on the label. Each word of sPartial must start a
+			word of the label (accents are ignored: resist matches Résistance) """
 		_result = []
 		if include_inactives:
-			for item in self.inactivelist:
-				if sPartial in item.name.upper():
-					_result.append( item )
-					#print( "match")
-		for item in self:
-			if sPartial in item.name.upper():
-				_result.append( item )
+			_result += self.__inactive_label_index.search( sPartial )
+		_result += self.__label_index.search( sPartial )
 		return _result
 
 
 	def search_products_for_ean( self, sEan ):
-		""" Find an active product from a partial reference """
-		_result = []
-		for item in self:
-			if item.ean13 == sEan:
-				_result.append( item )
-			elif (item.mpn!=None) and (item.mpn == sEan):
-				_result.append( item )
+		""" Find the active products having the ean13 (or mpn) """
+		_result = list( self.__ean_index.get( sEan, [] ) )
+		# Products ean12 are stored as ean13 (see load_from_xml)
+		if (len(sEan) == 12) and sEan.isdigit():
+			for item in self.__ean_index.get( calculate_ean13( sEan ), [] ):
+				if not( item in _result ):
+					_result.append( item )
 		return _result
 
+	def duplicate_eans( self ):
+		""" Return a dictionnary ean -> [ProductData, ...] for the ean13 (or mpn)
+			shared by several active products """
+		return dict( [ (key, list(lst)) for key, lst in self.__ean_index.items() if len(lst) > 1 ] )
+
 	@property
 	def last_id( self ):
 		""" return the last (greatest) product_id registered. Ignore combination product ID (> 100000)"""
@@ -50,9 +50,6 @@ HELP_MESSAGE = """+Q : quit
 #	format='%(asctime)s - [%(levelname)s] %(message)s',
 #	datefmt='%d/%m/%y %H:%M:%S.%f' )
 
-# LABEL Size is stored into the article reference of the "PARAMS" supplier.
-ID_SUPPLIER_PARAMS = None
-
 class MyApp:
 	def __init__( self, screen ):
 		self.screen = screen 
@@ -76,18 +73,7 @@ class MyApp:
 		self.logger.info( 'Starting app' )
 		self.config = Config()
 		self.cachedphelper  = CachedPrestaHelper( self.config.presta_api_url, self.config.presta_api_key, debug = False ) #, progressCallback = progressHandler )
-		# initialize global variables
-		self.initialize_globals()
-
-	def initialize_globals( self ):
-		""" Initialize the global var @ startup or @ reload """
-		global ID_SUPPLIER_PARAMS
-		_item = self.cachedphelper.suppliers.supplier_from_name( "PARAMS" )
-		#for _item in cachedphelper.suppliers:
-		#	print( '%i - %s' % (_item.id,_item.name) )
-		if _item != None:
-			ID_SUPPLIER_PARAMS = _item.id
-			self.logger.info( 'Catched PARAMS supplier :-). ID: %i' % ID_SUPPLIER_PARAMS )	
+		self.logger.info( 'PARAMS id_supplier: %s' % self.cachedphelper.id_supplier_params )
 
 	def create_subwin(self):
 		self.wresult = curses.newwin(self.height-1,self.width,0,0) # NLines, NCols, begin_y, begin_x
@@ -260,7 +246,6 @@ class MyApp:
 			elif _cmd.upper() == '+R':
 				self.status_redraw( info='Contacting WebShop and reloading...' )
 				self.cachedphelper.load_from_webshop()
-				self.initialize_globals() # reinit global variables
 				self.screen_redraw()
 				self.status_redraw( info='Data reloaded!')
 				sleep( 1 )
@@ -337,34 +322,8 @@ def list_products( cachedphelper, key=None, ean=None, id=None ):
 def get_product_params_dic( cachedpHelper,id_product ):
 	""" Locate the product parameter stored in the PARAMS supplier
 	    reference on the product. The reference is coded as follow
-	    param1:value1,param2:value2 """
-	
-	# If this special PARAMS supplier is not yet identified then
-	#   not possible to locate the special product parameter
-	#   stored there 
-	if ID_SUPPLIER_PARAMS == None:
-		return {}
-	
-	reference = ''
-	try:	
-		reference = cachedpHelper.product_suppliers.reference_for( id_product, ID_SUPPLIER_PARAMS )
-		# print( 'reference: %s' % reference )
-		if len(reference )==0:
-			return {}
-		
-		result = {}
-		lst = reference.split(',')
-		for item in lst:
-			vals = item.split(':')
-			if len( vals )!= 2:
-				raise Exception( 'a parameter must have 2 parts!' )
-			result[vals[0]] = vals[1]
-		
-		return result
-		
-	except Exception as e:
-		print( 'Error while processing param %s with message %s ' % (reference,str(e)) )	
-		return {}
+	    param1:value1,param2:value2 (decoded once by the cache) """
+	return cachedpHelper.product_params( id_product )
 		
 
 def ean12_to_ean13():
@@ -416,7 +375,6 @@ def main2():
 	print( '#product suppliers available = %i' % len( cachedphelper.product_suppliers ) )
 	print( '******************************************************************' )
 	print( '' )		
-	initialize_globals()
 
 	#print('mise à jour des qty' )
 	#cachedphelper.stock_availables.update_quantities()
@@ -436,7 +394,6 @@ def main2():
 		elif value == '+r':
 			print( 'Contacting WebShop and reloading...' )
 			cachedphelper.load_from_webshop()
-			initialize_globals() # reinit global variables	
 		elif value == '+s':
 			print( 'Saving cache...' )
 			cachedphelper.save_cache_file()